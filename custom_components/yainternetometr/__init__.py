@@ -2,16 +2,51 @@
 
 from __future__ import annotations
 import asyncio
-from asyncio import timeout
-from datetime import timedelta
+from asyncio import timeout, timeout_at
+from collections import deque
+import contextlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import importlib
 import logging
+import statistics
+import time
+from types import ModuleType
+from typing import TYPE_CHECKING
 
-from homeassistant.core import HomeAssistant
+import aiohttp
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.start import async_at_started
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-
-from .const import DOMAIN, CONF_UPDATE_INTERVAL, DEFAULT_SCAN_INTERVAL, SENSOR_PING, SENSOR_DOWNLOAD, SENSOR_UPLOAD, TIMEOUT_TEST
-from yaspeedtest.client import YaSpeedTest
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, CONF_UPDATE_INTERVAL, DEFAULT_SCAN_INTERVAL, SENSOR_PING, SENSOR_DOWNLOAD, SENSOR_UPLOAD, TIMEOUT_TEST, PROBES_CACHE_TTL
+from .const import CONF_UPLOAD_CONCURRENCY, DEFAULT_UPLOAD_CONCURRENCY, UPLOAD_FALLBACK_STABLE_RESULTS, UPLOAD_FALLBACK_STABLE_TOLERANCE
+from .const import CONF_STREAMS, DEFAULT_STREAMS, CONF_DOWNLOAD_CHUNK_SIZE, DEFAULT_DOWNLOAD_CHUNK_SIZE_KB
+from .const import UPLOAD_RETRY_ATTEMPTS, UPLOAD_RETRY_BYTE_BUDGET, UPLOAD_RETRY_TIME_BUDGET
+from .const import PAYLOAD_HISTORY_SIZE, PAYLOAD_TARGET_DURATION, PAYLOAD_MIN_SIZE, PAYLOAD_MAX_SIZE
+from .const import SENSOR_LATENCY_MIN, SENSOR_LATENCY_AVG, SENSOR_LATENCY_MAX, SENSOR_JITTER, SENSOR_PACKET_LOSS
+from .const import CONF_LATENCY_INTERVAL, DEFAULT_LATENCY_INTERVAL, CONF_LATENCY_PINGS, DEFAULT_LATENCY_PINGS
+from .const import CONF_ADAPTIVE_SCHEDULE, DEFAULT_ADAPTIVE_SCHEDULE, ADAPTIVE_BACKGROUND_FACTOR, ADAPTIVE_MIN_GAP
+from .const import CONF_REFRESH_COOLDOWN, DEFAULT_REFRESH_COOLDOWN
+from .const import CONF_SOURCE_ADDRESS, DATA_HISTORIES, DATA_TEST_SEMAPHORE, MAX_CONCURRENT_TESTS
+from .const import METRIC_PHASES, TEST_PUBLISH_MARGIN, DISCOVERY_TIMEOUT, STATISTIC_EXPIRE_INTERVAL
+from .const import DEVICE_MANUFACTURER, DEVICE_MODEL, DEVICE_NAME, DEVICE_IDENTIFIER
+from .const import ADAPTIVE_BASELINE_ALPHA, ADAPTIVE_BASELINE_SAMPLES, ADAPTIVE_LATENCY_DRIFT, ADAPTIVE_LATENCY_MIN_DRIFT_MS, ADAPTIVE_LOSS_DRIFT
+from .const import SENSOR_LOADED_PING_DOWNLOAD, SENSOR_LOADED_PING_UPLOAD, SENSOR_BUFFERBLOAT, LOADED_PING_MIN_SAMPLES
+from .const import PHASE_IDLE, PHASE_DISCOVERY, PHASE_PING, PHASE_DOWNLOAD, PHASE_UPLOAD, PHASE_UPLOAD_RETRY, PROGRESS_INTERVAL
+from .buffers import DownloadSink, UploadBuffer
+from .history import MeasurementHistory
+from .scheduler import TestScheduler
+from .stats import PhaseTimeouts, RollingStatistics
+from .timings import RequestTimings
+
+if TYPE_CHECKING:
+    # The client pulls in yaspeedtest and pydantic, it is imported on first use.
+    from .client import YaInternetometrClient
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,11 +54,10 @@ UPLOAD_CLASSIC_FALLBACK_SIZE = 1_000_000
 
 
 def _normalize_rate_mbps(value: float | int | None, metric_name: str) -> float:
-    """Normalize speed value to Mbit/s.
+    """Normalize a speed value in Mbit/s.
 
-    `yaspeedtest` should return Mbps, but some providers/versions may return bps.
-    This helper keeps current behavior for normal values and rescales only obviously
-    out-of-range numbers.
+    All rates are calculated by the integration itself from raw transfer samples, so the
+    value is already in Mbit/s. Missing and negative values are reported as 0.0.
     """
 
     if value is None:
@@ -34,17 +68,6 @@ def _normalize_rate_mbps(value: float | int | None, metric_name: str) -> float:
         _LOGGER.warning("Received negative %s value: %s", metric_name, value)
         return 0.0
 
-    # Defensive conversion: values in hundreds of thousands are likely bps.
-    if rate > 100_000:
-        converted = rate / 1_000_000
-        _LOGGER.debug(
-            "Converted %s from bps to Mbit/s: raw=%s normalized=%.3f",
-            metric_name,
-            value,
-            converted,
-        )
-        return converted
-
     return rate
 
 
@@ -92,7 +115,6 @@ def _extract_download_mbps(result: object, metric_name: str = "download") -> flo
             "download_mbit",
             "download_mbit_s",
             "download",
-            "download_bps",
         ),
         metric_name,
     )
@@ -107,12 +129,114 @@ def _extract_upload_mbps(result: object, metric_name: str = "upload") -> float:
             "upload_mbit",
             "upload_mbit_s",
             "upload",
-            "upload_bps",
         ),
         metric_name,
     )
 
 
+def _adaptive_payload_size(recent_mbps: list[float], default: int) -> int:
+    """
+    Pick a payload size that takes about `PAYLOAD_TARGET_DURATION` seconds to transfer.
+
+    The link rate is estimated as the median of recent non-zero results. Without history
+    `default` is returned. The size is clamped to `PAYLOAD_MIN_SIZE`..`PAYLOAD_MAX_SIZE`.
+    """
+
+    rates = [rate for rate in recent_mbps if rate > 0]
+    if not rates:
+        return default
+
+    size = int(statistics.median(rates) * 1_000_000 / 8 * PAYLOAD_TARGET_DURATION)
+    return max(PAYLOAD_MIN_SIZE, min(size, PAYLOAD_MAX_SIZE))
+
+
+def _latency_percentiles(samples: list[float]) -> dict[str, float | int]:
+    """Return p50, p90 and p95 of latency samples in ms, or an empty dict with too few samples."""
+    if len(samples) < LOADED_PING_MIN_SAMPLES:
+        return {}
+
+    quantiles = statistics.quantiles(samples, n=20, method="inclusive")
+    return {
+        "p50_ms": round(quantiles[9], 1),
+        "p90_ms": round(quantiles[17], 1),
+        "p95_ms": round(quantiles[18], 1),
+        "samples": len(samples),
+    }
+
+
+def _latency_stats(samples: list[float | None]) -> dict[str, float | None]:
+    """
+    Summarize a series of pings.
+
+    Jitter is the mean absolute difference between consecutive received round trips.
+    Loss is the share of lost pings in percent.
+    """
+
+    received = [rtt for rtt in samples if rtt is not None]
+    loss = (len(samples) - len(received)) / len(samples) * 100 if samples else None
+    if not received:
+        return {
+            SENSOR_LATENCY_MIN: None,
+            SENSOR_LATENCY_AVG: None,
+            SENSOR_LATENCY_MAX: None,
+            SENSOR_JITTER: None,
+            SENSOR_PACKET_LOSS: loss,
+        }
+
+    deltas = [abs(current - previous) for previous, current in zip(received, received[1:])]
+    return {
+        SENSOR_LATENCY_MIN: min(received),
+        SENSOR_LATENCY_AVG: statistics.fmean(received),
+        SENSOR_LATENCY_MAX: max(received),
+        SENSOR_JITTER: statistics.fmean(deltas) if deltas else 0.0,
+        SENSOR_PACKET_LOSS: loss,
+    }
+
+
+def _speedtest_update_interval(entry: ConfigEntry, minutes: int | None = None) -> timedelta | None:
+    """
+    Return the full test interval, None when scheduled tests are disabled.
+
+    In adaptive mode the interval is only a slow background refresh, so it is stretched
+    by `ADAPTIVE_BACKGROUND_FACTOR`. Early tests are triggered by the latency monitor.
+    """
+
+    if minutes is None:
+        minutes = entry.options.get(CONF_UPDATE_INTERVAL, DEFAULT_SCAN_INTERVAL)
+    if minutes <= 0:
+        return None
+    if entry.options.get(CONF_ADAPTIVE_SCHEDULE, DEFAULT_ADAPTIVE_SCHEDULE):
+        minutes *= ADAPTIVE_BACKGROUND_FACTOR
+    return timedelta(minutes=minutes)
+
+
+def _latency_update_interval(entry: ConfigEntry) -> timedelta | None:
+    """Return the latency monitor interval from the entry options, None when it is disabled."""
+    seconds = entry.options.get(CONF_LATENCY_INTERVAL, DEFAULT_LATENCY_INTERVAL)
+    return timedelta(seconds=seconds) if seconds > 0 else None
+
+
+def device_info(entry: ConfigEntry) -> dict[str, object]:
+    """
+    Return the device that groups the entities of a config entry.
+
+    The entry on the default route keeps the original identifier, so existing installs
+    keep their device. Entries bound to a source address get a device of their own.
+    """
+
+    source_address = entry.data.get(CONF_SOURCE_ADDRESS)
+    if not source_address:
+        identifier, name = DEVICE_IDENTIFIER, DEVICE_NAME
+    else:
+        identifier, name = f"{DEVICE_IDENTIFIER}_{source_address}", f"{DEVICE_NAME} {source_address}"
+    return {
+        "identifiers": {(DOMAIN, identifier)},
+        "name": name,
+        "manufacturer": DEVICE_MANUFACTURER,
+        "model": DEVICE_MODEL,
+    }
+
+
 def _get_value(source: object, field_name: str, default: object = None) -> object:
     """Read a field from an object or dict."""
     if isinstance(source, dict):
@@ -120,94 +244,273 @@ def _get_value(source: object, field_name: str, default: object = None) -> objec
     return getattr(source, field_name, default)
 
 
-async def _measure_upload_fallback_mbps(ya: YaSpeedTest) -> float:
-    """Measure upload directly from available upload probes."""
-    upload = _get_value(_get_value(ya, "probes"), "upload")
-    probes = _get_value(upload, "probes", []) or []
-    best_upload_mbps = 0.0
+def _is_upload_probe(probe: object) -> bool:
+    """Whether an upload probe has a URL and a positive size."""
+    try:
+        size = int(_get_value(probe, "size") or 0)
+    except (TypeError, ValueError):
+        size = 0
+    return bool(_get_value(probe, "url")) and size > 0
 
-    for probe_idx, probe in enumerate(probes, start=1):
-        url = _get_value(probe, "url")
-        size = _get_value(probe, "size")
-        probe_timeout = _get_value(probe, "timeout")
 
-        try:
-            size_int = int(size or 0)
-        except (TypeError, ValueError):
-            size_int = 0
+@dataclass
+class UploadFallbackResult:
+    """
+    Outcome of the direct upload probe fallback.
 
-        if not url or size_int <= 0:
-            _LOGGER.debug(
-                "Skipping upload fallback probe #%d: url=%s size=%s",
-                probe_idx,
-                url,
-                size,
-            )
-            continue
+    Attributes:
+        `per_probe_mbps` (dict[int, float]): Throughput of every finished probe, keyed by probe number.
+        `aggregate_mbps` (float): Total uploaded bytes over the wall time of the whole fallback.
+        `best_mbps` (float): The best value to publish, the maximum of any probe and the aggregate.
+    """
+
+    per_probe_mbps: dict[int, float] = field(default_factory=dict)
+    aggregate_mbps: float = 0.0
+    best_mbps: float = 0.0
+
+    def as_attributes(self) -> dict[str, object]:
+        """Return the result in a form suitable for entity state attributes."""
+        return {
+            "fallback_aggregate_mbps": round(self.aggregate_mbps, 2),
+            "fallback_probes_mbps": {
+                str(probe_idx): round(mbps, 2)
+                for probe_idx, mbps in sorted(self.per_probe_mbps.items())
+            },
+        }
+
+
+def _upload_results_stable(results: list[float]) -> bool:
+    """Check whether enough non-zero probe results agree within the tolerance."""
+    non_zero = [value for value in results if value > 0]
+    if len(non_zero) < UPLOAD_FALLBACK_STABLE_RESULTS:
+        return False
+
+    recent = non_zero[-UPLOAD_FALLBACK_STABLE_RESULTS:]
+    return (max(recent) - min(recent)) / max(recent) <= UPLOAD_FALLBACK_STABLE_TOLERANCE
 
+
+async def _measure_upload_probe(
+        ya: YaInternetometrClient,
+        probe_idx: int,
+        probe: object,
+        payload_size: int = UPLOAD_CLASSIC_FALLBACK_SIZE,
+) -> tuple[float, int] | None:
+    """
+    Measure upload against a single probe.
+
+    Runs `measure_upload_peak` first and falls back to the classic `measure_upload`
+    when the peak measurement returns zero. Both send `payload_size` bytes, whatever
+    the size of the probe, so the probe takes about the same time on any link.
+
+    Returns:
+        tuple[float, int] | None: Throughput in Mbit/s and uploaded bytes, or None if the probe was skipped.
+    """
+
+    url = _get_value(probe, "url")
+    probe_timeout = _get_value(probe, "timeout")
+
+    if not _is_upload_probe(probe):
+        _LOGGER.debug(
+            "Skipping upload fallback probe #%d: url=%s size=%s",
+            probe_idx,
+            url,
+            _get_value(probe, "size"),
+        )
+        return None
+
+    try:
+        raw_upload_mbps, sent_bytes = await ya.measure_upload_peak(url, payload_size, probe_timeout)
+    except asyncio.CancelledError:
+        raise
+    except Exception as err:
+        _LOGGER.debug(
+            "Upload fallback probe #%d failed: %s",
+            probe_idx,
+            err,
+        )
+        return None
+
+    upload_mbps = _normalize_rate_mbps(
+        raw_upload_mbps,
+        f"upload_fallback_probe_{probe_idx}",
+    )
+    # A converged probe stops sending early, only the bytes that were sent count.
+    uploaded_bytes = sent_bytes if upload_mbps > 0 else 0
+
+    if upload_mbps == 0 and hasattr(ya, "measure_upload"):
+        _LOGGER.debug(
+            "Running classic upload fallback probe #%d: payload_size=%d",
+            probe_idx,
+            payload_size,
+        )
         try:
-            raw_upload_mbps = await ya.measure_upload_peak(url, size_int, probe_timeout)
+            elapsed, classic_bytes = await ya.measure_upload(
+                url,
+                payload_size,
+                probe_timeout,
+            )
         except asyncio.CancelledError:
             raise
         except Exception as err:
             _LOGGER.debug(
-                "Upload fallback probe #%d failed: %s",
+                "Classic upload fallback probe #%d failed: %s",
                 probe_idx,
                 err,
             )
-            continue
-
-        upload_mbps = _normalize_rate_mbps(
-            raw_upload_mbps,
-            f"upload_fallback_probe_{probe_idx}",
-        )
-
-        if upload_mbps == 0 and hasattr(ya, "measure_upload"):
-            classic_size = max(size_int, UPLOAD_CLASSIC_FALLBACK_SIZE)
-            _LOGGER.debug(
-                "Running classic upload fallback probe #%d: probe_size=%d classic_size=%d",
-                probe_idx,
-                size_int,
-                classic_size,
-            )
-            try:
-                elapsed, uploaded_bytes = await ya.measure_upload(
-                    url,
-                    classic_size,
-                    probe_timeout,
+        else:
+            if elapsed and elapsed != float("inf") and classic_bytes > 0:
+                classic_upload_mbps = (classic_bytes * 8) / elapsed / 1_000_000
+                upload_mbps = _normalize_rate_mbps(
+                    classic_upload_mbps,
+                    f"upload_classic_fallback_probe_{probe_idx}",
                 )
-            except asyncio.CancelledError:
-                raise
-            except Exception as err:
+                uploaded_bytes = classic_bytes
                 _LOGGER.debug(
-                    "Classic upload fallback probe #%d failed: %s",
+                    "Classic upload fallback probe #%d result: %.2f Mbit/s",
                     probe_idx,
-                    err,
+                    upload_mbps,
+                )
+
+    _LOGGER.debug(
+        "Upload fallback probe #%d result: %.2f Mbit/s",
+        probe_idx,
+        upload_mbps,
+    )
+    return upload_mbps, uploaded_bytes
+
+
+async def _measure_upload_fallback(
+        ya: YaInternetometrClient,
+        concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+        payload_size: int = UPLOAD_CLASSIC_FALLBACK_SIZE,
+) -> UploadFallbackResult:
+    """
+    Measure upload directly from available upload probes.
+
+    Probes run at most `concurrency` at a time. As soon as the finished probes
+    report a stable non-zero throughput, the remaining probes are cancelled.
+    """
+
+    upload = _get_value(_get_value(ya, "probes"), "upload")
+    probes = _get_value(upload, "probes", []) or []
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    fallback = UploadFallbackResult()
+    ya.start_phase(PHASE_UPLOAD_RETRY, len(probes))
+
+    async def run_probe(probe_idx: int, probe: object) -> tuple[int, tuple[float, int] | None]:
+        async with semaphore:
+            probe_result = await _measure_upload_probe(ya, probe_idx, probe, payload_size)
+        ya.finish_step()
+        return probe_idx, probe_result
+
+    tasks = [
+        asyncio.create_task(run_probe(probe_idx, probe))
+        for probe_idx, probe in enumerate(probes, start=1)
+    ]
+    uploaded_bytes = 0
+    started = time.perf_counter()
+
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            probe_idx, probe_result = await next_result
+            if probe_result is None:
+                continue
+
+            upload_mbps, probe_bytes = probe_result
+            fallback.per_probe_mbps[probe_idx] = upload_mbps
+            uploaded_bytes += probe_bytes
+
+            if _upload_results_stable(list(fallback.per_probe_mbps.values())):
+                _LOGGER.debug(
+                    "Upload fallback is stable after %d probes, cancelling the rest",
+                    len(fallback.per_probe_mbps),
                 )
-            else:
-                if elapsed and elapsed != float("inf") and uploaded_bytes > 0:
-                    classic_upload_mbps = (uploaded_bytes * 8) / elapsed / 1_000_000
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    elapsed = time.perf_counter() - started
+    if uploaded_bytes > 0 and elapsed > 0:
+        fallback.aggregate_mbps = (uploaded_bytes * 8) / elapsed / 1_000_000
+
+    fallback.best_mbps = max([fallback.aggregate_mbps, *fallback.per_probe_mbps.values()])
+
+    if fallback.best_mbps > 0:
+        _LOGGER.info(
+            "Using direct upload fallback result: %.2f Mbit/s (aggregate %.2f Mbit/s over %d probes)",
+            fallback.best_mbps,
+            fallback.aggregate_mbps,
+            len(fallback.per_probe_mbps),
+        )
+
+    return fallback
+
+
+async def _remeasure_upload_mbps(
+        ya: YaInternetometrClient,
+        payload_size: int = UPLOAD_CLASSIC_FALLBACK_SIZE,
+) -> float:
+    """
+    Repeat only the upload phase on the already discovered probes.
+
+    Unlike a full `run()`, no ping or download is measured. Every pass walks the
+    upload probes with the classic `measure_upload` until a non-zero value is found,
+    spending at most `UPLOAD_RETRY_BYTE_BUDGET` bytes and `UPLOAD_RETRY_TIME_BUDGET` seconds.
+    Every measurement sends `payload_size` bytes, but never more than an even share of the
+    bytes left, so a large payload on a fast link does not use the budget up on one probe.
+    """
+
+    upload = _get_value(_get_value(ya, "probes"), "upload")
+    probes = _get_value(upload, "probes", []) or []
+    bytes_left = UPLOAD_RETRY_BYTE_BUDGET
+    measurements_left = UPLOAD_RETRY_ATTEMPTS * sum(1 for probe in probes if _is_upload_probe(probe))
+    best_upload_mbps = 0.0
+    ya.start_phase(PHASE_UPLOAD_RETRY, UPLOAD_RETRY_ATTEMPTS * len(probes))
+
+    try:
+        async with timeout(UPLOAD_RETRY_TIME_BUDGET):
+            for retry_idx in range(1, UPLOAD_RETRY_ATTEMPTS + 1):
+                for probe_idx, probe in enumerate(probes, start=1):
+                    if not _is_upload_probe(probe):
+                        ya.finish_step()
+                        continue
+
+                    size_int = min(payload_size, bytes_left // measurements_left)
+                    measurements_left -= 1
+                    if size_int <= 0:
+                        _LOGGER.debug("Upload re-measurement byte budget is exhausted")
+                        return best_upload_mbps
+
+                    bytes_left -= size_int
+                    elapsed, uploaded_bytes = await ya.measure_upload(
+                        _get_value(probe, "url"),
+                        size_int,
+                        _get_value(probe, "timeout"),
+                    )
+                    ya.finish_step()
+                    if not elapsed or elapsed == float("inf") or uploaded_bytes <= 0:
+                        continue
+
                     upload_mbps = _normalize_rate_mbps(
-                        classic_upload_mbps,
-                        f"upload_classic_fallback_probe_{probe_idx}",
+                        (uploaded_bytes * 8) / elapsed / 1_000_000,
+                        f"upload_retry_{retry_idx}_probe_{probe_idx}",
                     )
                     _LOGGER.debug(
-                        "Classic upload fallback probe #%d result: %.2f Mbit/s",
+                        "Upload re-measurement #%d probe #%d result: %.2f Mbit/s",
+                        retry_idx,
                         probe_idx,
                         upload_mbps,
                     )
+                    best_upload_mbps = max(best_upload_mbps, upload_mbps)
 
+                if best_upload_mbps > 0:
+                    break
+    except TimeoutError:
         _LOGGER.debug(
-            "Upload fallback probe #%d result: %.2f Mbit/s",
-            probe_idx,
-            upload_mbps,
-        )
-        best_upload_mbps = max(best_upload_mbps, upload_mbps)
-
-    if best_upload_mbps > 0:
-        _LOGGER.info(
-            "Using direct upload fallback result: %.2f Mbit/s",
-            best_upload_mbps,
+            "Upload re-measurement time budget of %d s is exhausted",
+            UPLOAD_RETRY_TIME_BUDGET,
         )
 
     return best_upload_mbps
@@ -229,9 +532,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         `entry` (ConfigEntry): The configuration entry for the current integration, contains the unique identifier entry_id and the saved configuration data.
 
     Method actions:
-        1. Creates a YaInternetometrDataUpdateCoordinator instance, which will periodically poll the YaSpeedTest service.
-        2. Calls async_config_entry_first_refresh() to obtain initial data before displaying sensors.
-        3. Registers the coordinator in hass.data under the unique identifier of the configuration entry entry.entry_id.
+        1. Creates a YaInternetometrDataUpdateCoordinator instance, which will periodically poll the YaSpeedTest service,
+        and a YaInternetometrLatencyCoordinator that samples ping between full tests once its sensors subscribe.
+        The speed test client and its HTTP session are created on first use, not during setup.
+        2. Loads the persisted measurement history and restores the last results from it, so no test runs during boot.
+        Once Home Assistant has started, the `TestScheduler` of the coordinator takes over: the first test runs
+        in the next slot of this install, or right away if there is nothing to restore.
+        3. Registers the coordinators in hass.data under the unique identifier of the configuration entry entry.entry_id.
+        The semaphore that serialises full tests of all entries is kept next to them under `DATA_TEST_SEMAPHORE`,
+        the measurement histories under `DATA_HISTORIES`.
         4. Loads the sensor platform via async_forward_entry_setups so that Home Assistant can create the corresponding SensorEntity.
         5. Returns True if setup was successful.
 
@@ -239,35 +548,87 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         bool: True if integration setup was successful, False if an error occurred.
     """
 
-    scan_interval:any = entry.options.get(
-        CONF_UPDATE_INTERVAL,
-        DEFAULT_SCAN_INTERVAL,
-    )
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    domain_data.setdefault(DATA_TEST_SEMAPHORE, asyncio.Semaphore(MAX_CONCURRENT_TESTS))
+    histories = domain_data.setdefault(DATA_HISTORIES, {})
 
-    update_interval = (
-        timedelta(minutes=scan_interval)
-        if scan_interval > 0 else None
-    )
+    update_interval = _speedtest_update_interval(entry)
 
     coordinator = YaInternetometrDataUpdateCoordinator(hass, entry, update_interval)
+    await coordinator.async_load_history()
+    histories[entry.entry_id] = coordinator.history
+    latency_coordinator = YaInternetometrLatencyCoordinator(hass, entry, coordinator)
 
-    if update_interval is not None:
-        hass.async_create_task(
-            coordinator.async_config_entry_first_refresh()
-        )
-    else:
+    if update_interval is None:
         _LOGGER.info(
             "YaInternetometr started with update interval = 0, "
             "automatic updates disabled"
         )
 
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = {"coordinator": coordinator}
+    @callback
+    def _async_start_scheduler(_hass: HomeAssistant) -> None:
+        coordinator.scheduler.async_start()
+
+    entry.async_on_unload(async_at_started(hass, _async_start_scheduler))
+    entry.async_on_unload(coordinator.scheduler.async_stop)
+    entry.async_on_unload(async_track_time_interval(
+        hass, coordinator.async_expire_statistics, timedelta(seconds=STATISTIC_EXPIRE_INTERVAL)
+    ))
+
+    domain_data[entry.entry_id] = {
+        "coordinator": coordinator,
+        "latency_coordinator": latency_coordinator,
+    }
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     await hass.config_entries.async_forward_entry_setups(entry, ["sensor", "number", "button"])
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """
+    Apply changed update intervals, the adaptive schedule, quiet hours and the daily cap without reloading the entry.
+
+    Enabling or disabling the latency monitor reloads the entry, which adds or removes its sensors.
+    Other options are read by the coordinators on every run, so they need no action here.
+    The number entity writes a pending interval while it is removed, so the listener may run
+    after the entry was unloaded. The next setup reads the options anyway, nothing is left to do.
+    """
+
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if entry_data is None:
+        return
+    coordinator = entry_data["coordinator"]
+    coordinator.set_scan_interval(entry.options.get(CONF_UPDATE_INTERVAL, DEFAULT_SCAN_INTERVAL))
+    # Quiet hours or the daily cap may have changed as well.
+    coordinator.scheduler.reschedule()
+
+    latency_coordinator = entry_data["latency_coordinator"]
+    update_interval = _latency_update_interval(entry)
+    if update_interval == latency_coordinator.update_interval:
+        return
+    if (update_interval is None) != (latency_coordinator.update_interval is None):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    latency_coordinator.update_interval = update_interval
+    if update_interval is not None:
+        await latency_coordinator.async_request_refresh()
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """
+    Delete the persisted measurement history when the configuration entry is removed.
+
+    The history that was last loaded for the entry is used if there is one, so a save it still
+    has pending is cancelled instead of writing the file again after it was deleted.
+    """
+    history = hass.data.get(DOMAIN, {}).get(DATA_HISTORIES, {}).pop(entry.entry_id, None)
+    if history is None:
+        history = MeasurementHistory(hass, entry.entry_id)
+    await history.async_remove()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """
     Unloading the YaInternetometr integration when deleting or disabling a configuration entry.
@@ -283,7 +644,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         1. Calls async_unload_platforms to unload all platforms associated
         with this configuration entry (in our case, sensors).
         2. If the unload is successful, deletes the coordinator and associated data
-        from hass.data by the entry.entry_id key.
+        from hass.data by the entry.entry_id key, closes the pooled HTTP session if one was opened, releases the upload buffer
+        and writes the measurement history, so the latest records survive a reload.
         3. Returns the result of unloading the platforms.
 
     Return value:
@@ -292,7 +654,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     unload_ok = await hass.config_entries.async_unload_platforms(entry, ["sensor", "number", "button"])
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data["coordinator"].async_close()
     return unload_ok
 
 
@@ -311,154 +674,761 @@ class YaInternetometrDataUpdateCoordinator(DataUpdateCoordinator):
         `hass` (HomeAssistant): The main Home Assistant object.
         `_LOGGER` (Logger): Logger for outputting debug information.
         `name` (str): The name of the coordinator, used in logs.
-        `update_interval` (timedelta): The automatic data update interval.
+        `scheduler` (TestScheduler): Runs scheduled tests with a phase offset, quiet hours and a daily cap.
+        `attributes` (dict): Extra state attributes of the last run, keyed by sensor type.
+        `progress` (dict): Phase, percent done and instantaneous Mbit/s of the running test.
+        `upload_buffer` (UploadBuffer): The preallocated payload shared by every upload probe.
+        `download_sink` (DownloadSink): Drops download bodies as they arrive and tracks their memory high-water mark.
+        `timings` (RequestTimings): DNS, connect, TTFB and transfer timings of the requests of the last run.
+        `history` (MeasurementHistory): Persistent ring buffer with the results of every run.
+        `statistics` (RollingStatistics): Rolling percentiles and means over the recent history.
+        `phase_timeouts` (PhaseTimeouts): Durations of recent phases and the timeouts derived from them.
+        `last_measurement` (datetime | None): When the last successful run finished, restored after a restart.
+        `measured_at` (dict[str, datetime]): When ping, download and upload were last measured, stale values excluded.
 
     Methods:
         `__init__`: Initializes the coordinator.
+        `async_get_client`: Returns a warm YaSpeedTest client, repeating probe discovery only after `PROBES_CACHE_TTL`.
+        `_async_import_client`: Imports the client module in the executor on first use.
+        `async_close`: Closes the HTTP session and releases the upload buffer.
+        `_invalidate_client`: Drops the cached client so the next run rediscovers probes.
+        `async_add_progress_listener`: Subscribes to progress updates, which are published at most once per `PROGRESS_INTERVAL`.
+        `_record_rates`: Remembers fresh download and upload results for adaptive payload sizing.
+        `_payload_size`: Picks the payload size of a phase from the remembered results.
+        `set_scan_interval`: Applies the update interval chosen by the user to the scheduler.
+        `async_load_history`: Loads the persisted history, seeds the rolling statistics and restores the last result.
+        `async_expire_statistics`: Drops old values from the rolling statistics between runs.
+        `seconds_since_last_measurement`: Age of the last successful result.
+        `_record_history`: Appends the outcome of a run to the history and the rolling statistics.
+        `seconds_since_last_run`: Time since the last full test started.
         `_async_update_data`: An asynchronous method that Home Assistant calls to obtain new data with each update.
+        `async_run_test`: Starts a speed test or joins the one in flight, honouring the cooldown.
+        `test_running`: Whether a speed test is in flight.
+        `cooldown_remaining`: Seconds until a new test may start.
+        `_async_run_test`: Runs one speed test once no other entry is testing.
+        `_async_measure`: Measures ping, download and upload.
     """
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, update_interval: timedelta | None) -> None:
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            entry: ConfigEntry,
+            update_interval: timedelta | None,
+    ) -> None:
         """
         Coordinator initialization.
 
         Parameters:
             `hass` (HomeAssistant): The main Home Assistant object through which interaction with the platform occurs.
+            `entry` (ConfigEntry): The configuration entry of the integration.
+            `update_interval` (timedelta | None): Interval of scheduled tests, None to disable them.
+                Tests are started by the `TestScheduler`, not by the coordinator's own timer.
         """
 
         super().__init__(
             hass,
             _LOGGER,
             name="YaInternetometr Data Coordinator",
-            update_interval=update_interval
+            update_interval=None,
+            config_entry=entry,
         )
-        self._update_lock = asyncio.Lock()
+        self._test_task: asyncio.Task[dict[str, float | None]] | None = None
+        self._last_run_finished: float | None = None
+        self._last_run_error: BaseException | None = None
+        self._client_module: ModuleType | None = None
+        self._session: aiohttp.ClientSession | None = None
+        self._remove_session_listener: CALLBACK_TYPE | None = None
+        self._client_lock = asyncio.Lock()
+        self.upload_buffer = UploadBuffer()
+        self.download_sink = DownloadSink()
+        self.timings = RequestTimings()
+        self.history = MeasurementHistory(hass, entry.entry_id)
+        self.statistics = RollingStatistics()
+        self.phase_timeouts = PhaseTimeouts()
+        self._phase_timeouts_streams: int | None = None
+        self.scheduler = TestScheduler(hass, self, update_interval)
+        self.last_measurement: datetime | None = None
+        self.measured_at: dict[str, datetime] = {}
+        self._client: YaInternetometrClient | None = None
+        self._client_expires_at: float = 0.0
+        self._last_run_started: float | None = None
+        self.attributes: dict[str, dict[str, object]] = {}
+        self.progress: dict[str, object] = {"phase": PHASE_IDLE, "percent": 0, "mbps": 0.0}
+        self._progress_listeners: list[CALLBACK_TYPE] = []
+        self._recent_rates: dict[str, deque[float]] = {
+            SENSOR_DOWNLOAD: deque(maxlen=PAYLOAD_HISTORY_SIZE),
+            SENSOR_UPLOAD: deque(maxlen=PAYLOAD_HISTORY_SIZE),
+        }
 
-    async def _async_update_data(self) -> dict[str, float]:
+    async def async_get_client(self) -> YaInternetometrClient:
+        """
+        Return a YaSpeedTest client with a discovered probe list.
+
+        Probe discovery is a separate request to the Yandex API, so the client is kept
+        between runs and recreated only when the cached probe list is older than
+        `PROBES_CACHE_TTL` seconds or was invalidated after a failure.
+
+        The full test and the latency monitor share the client. Refreshes are serialised,
+        so callers that find the cache expired at the same time discover the probes once
+        and get the same client.
+        """
+
+        async with self._client_lock:
+            now = time.monotonic()
+            if self._client is not None and now < self._client_expires_at:
+                _LOGGER.debug(
+                    "Reusing cached YaSpeedTest probes (expire in %.0f s)",
+                    self._client_expires_at - now,
+                )
+                return self._client
+
+            client_module = await self._async_import_client()
+            if self._session is None:
+                self._session, self._remove_session_listener = client_module.async_create_session(
+                    self.hass,
+                    self.timings,
+                    self.config_entry.data.get(CONF_SOURCE_ADDRESS) or None,
+                )
+
+            _LOGGER.debug("Discovering YaSpeedTest probes")
+            self._client = await client_module.YaInternetometrClient.create(
+                self._session,
+                self.upload_buffer,
+                self.download_sink,
+                self.timings,
+            )
+            self._client_expires_at = time.monotonic() + PROBES_CACHE_TTL
+            return self._client
+
+    async def _async_import_client(self) -> ModuleType:
+        """
+        Import the client module on first use.
+
+        The import loads yaspeedtest and its dependencies, so it runs in the executor
+        instead of during Home Assistant startup on the event loop.
+        """
+
+        if self._client_module is None:
+            self._client_module = await self.hass.async_add_import_executor_job(
+                importlib.import_module, ".client", __name__
+            )
+        return self._client_module
+
+    async def async_close(self) -> None:
+        """Cancel a running test, close the HTTP session, if one was opened, release the upload buffer and flush the history."""
+        if self._test_task is not None:
+            self._test_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._test_task
+        if self._session is not None:
+            self._remove_session_listener()
+            self._remove_session_listener = None
+            await self._session.close()
+            self._session = None
+        self.upload_buffer.close()
+        await self.history.async_flush()
+
+    def _invalidate_client(self) -> None:
+        """Forget the cached client so the next run starts with probe discovery."""
+        self._client = None
+        self._client_expires_at = 0.0
+
+    def set_scan_interval(self, minutes: int) -> None:
+        """
+        Apply the update interval from the number entity, 0 disables scheduled tests.
+
+        The scheduler moves the next test to the grid of the new interval. The change
+        itself never starts a test.
+        """
+
+        self.scheduler.set_interval(_speedtest_update_interval(self.config_entry, minutes))
+
+    async def async_load_history(self) -> None:
+        """
+        Load the persisted history. This is the only time the rolling statistics read all of it.
+
+        The last successful result becomes the coordinator data, so sensors show it right
+        after a restart instead of waiting for a new test.
+        """
+
+        await self.history.async_load()
+        for row in self.history.rows():
+            self.statistics.add(row["timestamp"], {
+                metric: row[metric]
+                for metric in (SENSOR_PING, SENSOR_DOWNLOAD, SENSOR_UPLOAD)
+            })
+
+        last_result = self.history.last_result
+        if last_result is None:
+            return
+
+        self.last_measurement = dt_util.utc_from_timestamp(last_result["timestamp"])
+        self.attributes = last_result["attributes"]
+        for sensor_type in (SENSOR_PING, SENSOR_DOWNLOAD, SENSOR_UPLOAD):
+            measured_at = self.attributes.get(sensor_type, {}).get("measured_at")
+            self.measured_at[sensor_type] = dt_util.parse_datetime(measured_at) if measured_at else self.last_measurement
+        self.data = {**last_result["data"], **self.statistics.as_data(time.time())}
+        _LOGGER.debug("Restored speedtest result from %s", self.last_measurement)
+
+    @callback
+    def async_expire_statistics(self, _now: datetime | None = None) -> None:
+        """Drop values that left the statistics windows and update the sensors if a statistic changed."""
+        if self.data is None:
+            return
+        current = self.statistics.as_data(time.time())
+        if all(self.data.get(key) == value for key, value in current.items()):
+            return
+        self.data = {**self.data, **current}
+        self.async_update_listeners()
+
+    @property
+    def seconds_since_last_measurement(self) -> float | None:
+        """Seconds since the last successful run finished, None if there was none."""
+        if self.last_measurement is None:
+            return None
+        return (dt_util.utcnow() - self.last_measurement).total_seconds()
+
+    def _record_history(self, data: dict[str, float | None] | None, transferred: int) -> None:
+        """Append the run that started at `_last_run_started` to the history. `data` is None for a failed run."""
+        data = data or {}
+        now = time.time()
+        self.statistics.add(now, data)
+        self.history.append(
+            timestamp=now,
+            ping=data.get(SENSOR_PING),
+            download=data.get(SENSOR_DOWNLOAD),
+            upload=data.get(SENSOR_UPLOAD),
+            duration=time.monotonic() - self._last_run_started,
+            transferred=transferred,
+        )
+
+    @property
+    def seconds_since_last_run(self) -> float | None:
+        """Seconds since the last full test started, or since the restored result before the first one."""
+        if self._last_run_started is None:
+            return self.seconds_since_last_measurement
+        return time.monotonic() - self._last_run_started
+
+    @callback
+    def async_add_progress_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for progress updates of the running test. Returns a callback that removes the listener."""
+        self._progress_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._progress_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_set_progress(self, phase: str, percent: float, mbps: float) -> None:
+        """Store the current progress and notify progress listeners."""
+        self.progress = {"phase": phase, "percent": round(percent), "mbps": round(mbps, 2)}
+        for update_callback in list(self._progress_listeners):
+            update_callback()
+
+    async def _async_track_progress(self) -> None:
+        """
+        Publish the progress of the running test once per `PROGRESS_INTERVAL`.
+
+        Instantaneous throughput is the number of bytes the client moved since the
+        previous update. Publishing on a fixed interval keeps the state machine and
+        the recorder from being flooded by per-chunk updates.
+        """
+
+        last_bytes: int | None = None
+        last_ts = time.perf_counter()
+
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            client = self._client
+            if client is None or client.phase == PHASE_IDLE:
+                continue
+
+            now = time.perf_counter()
+            mbps = 0.0
+            if last_bytes is not None and now > last_ts:
+                mbps = (client.transferred - last_bytes) * 8 / (now - last_ts) / 1_000_000
+            last_bytes, last_ts = client.transferred, now
+
+            self._async_set_progress(client.phase, client.percent, mbps)
+
+    def _record_rates(self, download_mbps: float, upload_mbps: float) -> None:
+        """Remember the last `PAYLOAD_HISTORY_SIZE` non-zero results of each phase."""
+        for metric, rate in ((SENSOR_DOWNLOAD, download_mbps), (SENSOR_UPLOAD, upload_mbps)):
+            if rate > 0:
+                self._recent_rates[metric].append(rate)
+
+    def _payload_size(self, metric: str) -> int:
+        """Return the payload size for a phase, aiming at `PAYLOAD_TARGET_DURATION` seconds."""
+        size = _adaptive_payload_size(list(self._recent_rates[metric]), UPLOAD_CLASSIC_FALLBACK_SIZE)
+        _LOGGER.debug("Adaptive %s payload size: %d bytes", metric, size)
+        return size
+
+    async def _async_update_data(self) -> dict[str, float | None]:
         """
         Asynchronous data update from the YaSpeedTest service.
 
-        This method is called automatically by Home Assistant for each update.
-        It creates a YaSpeedTest client, runs a speed test, and returns a dictionary
-        with the results:
+        This method is called automatically by Home Assistant for each update and by every
+        manual refresh. It joins the test in flight through `async_run_test`, so concurrent
+        callers share one run and all receive its result, which is a dictionary:
         
         ```
         {
             "ping": <float>, # latency in milliseconds
             "download": <float>, # download speed in Mbps
             "upload": <float>, # upload speed in Mbps
+            "loaded_ping_download": <float | None>, # median latency during download in ms
+            "loaded_ping_upload": <float | None>, # median latency during upload in ms
+            "bufferbloat": <float | None>, # latency increase under load over idle ping in ms
+            "download_p50_24h": <float | None>, # rolling statistics, see `RollingStatistics`
+            ...
         }
         ```
         """
 
-        if self._update_lock.locked() and self.data is not None:
-            _LOGGER.debug("Speedtest already running — skipping update")
-            return self.data
-    
-        async with self._update_lock:
-            try:
-                async with timeout(TIMEOUT_TEST):
-                    ya = await YaSpeedTest.create()
-                    result = await ya.run()
-                    _LOGGER.debug("Raw YaSpeedTest result payload: %s", result)
-
-                    upload_mbps = _extract_upload_mbps(result)
-                    download_mbps = _extract_download_mbps(result)
-                    ping_ms = _extract_ping_ms(result)
-
-                    if upload_mbps == 0 and download_mbps > 1:
-                        _LOGGER.warning(
-                            "Upload speed is zero while download is %.2f Mbit/s. "
-                            "Trying direct upload probe fallback first.",
-                            download_mbps,
-                        )
+        return await self.async_run_test()
 
-                        fallback_upload_mbps = await _measure_upload_fallback_mbps(ya)
-                        if fallback_upload_mbps > upload_mbps:
-                            upload_mbps = fallback_upload_mbps
+    async def async_run_test(self) -> dict[str, float | None]:
+        """
+        Run a speed test, or join the one in flight, and return its result.
 
-                        if upload_mbps == 0:
-                            _LOGGER.warning(
-                                "Direct upload probe fallback returned 0.00 Mbit/s. "
-                                "Running up to 2 extra verification passes.",
+        Only one test runs at a time. The test is a background task shielded from the callers,
+        so a cancelled caller does not abort the run for the others. Requests that arrive less
+        than `refresh_cooldown` seconds after a finished test get that test's result instead of
+        starting a new one, or its error if it failed.
+
+        Raises:
+            UpdateFailed: The test failed, or it failed recently and the cooldown is not over.
+        """
+
+        if self._test_task is None:
+            cooldown = self.cooldown_remaining
+            if cooldown > 0:
+                _LOGGER.debug("Speedtest finished recently — reusing its result for %.0f s more", cooldown)
+                if self._last_run_error is not None or self.data is None:
+                    raise UpdateFailed(
+                        f"Speedtest failed recently, next attempt in {cooldown:.0f} s"
+                    ) from self._last_run_error
+                return self.data
+            self._test_task = self.hass.async_create_background_task(
+                self._async_run_test(),
+                "yainternetometr speedtest",
+            )
+            self._test_task.add_done_callback(self._async_test_done)
+        else:
+            _LOGGER.debug("Speedtest already running — joining it")
+
+        return await asyncio.shield(self._test_task)
+
+    @callback
+    def _async_test_done(self, task: asyncio.Task) -> None:
+        """Release the single-flight slot, start the cooldown and remember whether the test failed."""
+        self._test_task = None
+        self._last_run_finished = time.monotonic()
+        # Retrieving the error also marks it as retrieved in case every caller has gone away.
+        self._last_run_error = None if task.cancelled() else task.exception()
+
+    @property
+    def test_running(self) -> bool:
+        """Whether a full speed test is in flight."""
+        return self._test_task is not None
+
+    @property
+    def cooldown_remaining(self) -> float:
+        """Seconds until a new test may start, 0 when it may start now."""
+        if self._last_run_finished is None:
+            return 0.0
+        cooldown = self.config_entry.options.get(CONF_REFRESH_COOLDOWN, DEFAULT_REFRESH_COOLDOWN)
+        return max(0.0, cooldown - (time.monotonic() - self._last_run_finished))
+
+    async def _async_run_test(self) -> dict[str, float | None]:
+        """
+        Run one speed test. Called only by `async_run_test`.
+
+        Full tests of all config entries are serialised by the domain semaphore, so links
+        measured from the same Home Assistant never compete for bandwidth. The latency
+        monitors are not affected and keep running in parallel.
+        """
+
+        semaphore: asyncio.Semaphore = self.hass.data[DOMAIN][DATA_TEST_SEMAPHORE]
+        if semaphore.locked():
+            _LOGGER.debug("Speedtest of another entry is running — waiting for it")
+        async with semaphore:
+            return await self._async_measure()
+
+    async def _async_measure(self) -> dict[str, float | None]:
+        """
+        Measure ping, download and upload and publish the result.
+
+        Every phase has its own deadline from `phase_timeouts` inside the `TIMEOUT_TEST` budget,
+        learned from the durations of recent runs, so a stalled probe is given up within seconds.
+        A phase that misses it keeps its previous value, marked in the attributes as stale with
+        the time it was measured and its age, while the phases that finished are published.
+        The run fails only when no phase finished.
+        """
+
+        self._last_run_started = time.monotonic()
+        self._async_set_progress(PHASE_DISCOVERY, 0, 0.0)
+        progress_task = self.hass.async_create_background_task(
+            self._async_track_progress(),
+            "yainternetometr progress",
+        )
+
+        ya: YaInternetometrClient | None = None
+        start_bytes = 0
+        # Phases and fallbacks stop here, the rest of the budget is left for publishing what finished.
+        deadline = asyncio.get_running_loop().time() + TIMEOUT_TEST - TEST_PUBLISH_MARGIN
+
+        try:
+            async with timeout(TIMEOUT_TEST):
+                attributes: dict[str, dict[str, object]] = {}
+                self.download_sink.chunk_size = self.config_entry.options.get(
+                    CONF_DOWNLOAD_CHUNK_SIZE,
+                    DEFAULT_DOWNLOAD_CHUNK_SIZE_KB,
+                ) * 1024
+                self.download_sink.reset()
+                self.timings.reset()
+                self.timings.phase = PHASE_DISCOVERY
+                async with timeout(DISCOVERY_TIMEOUT):
+                    ya = await self.async_get_client()
+                start_bytes = ya.transferred
+                streams = self.config_entry.options.get(CONF_STREAMS, DEFAULT_STREAMS)
+                if streams != self._phase_timeouts_streams:
+                    # Single and multi-stream phases take different times, learn them anew.
+                    self.phase_timeouts = PhaseTimeouts()
+                    self._phase_timeouts_streams = streams
+                timeouts = self.phase_timeouts.as_dict()
+                _LOGGER.debug("Phase timeouts: %s", timeouts)
+                if streams == 1:
+                    result = await ya.run(phase_timeouts=timeouts, deadline=deadline)
+                else:
+                    result = await ya.run_multistream(streams, phase_timeouts=timeouts, deadline=deadline)
+                # Phases stopped by their deadline, even with a partial result, back their timeout off.
+                for phase, seconds in ya.phase_durations.items():
+                    self.phase_timeouts.add(phase, seconds, phase in ya.timed_out_phases | ya.partial_phases)
+                _LOGGER.debug("Raw YaSpeedTest result payload: %s", result)
+                _LOGGER.debug(
+                    "Download buffer high-water mark: %d bytes (read buffer %d bytes)",
+                    self.download_sink.high_water_mark,
+                    self.download_sink.chunk_size,
+                )
+                attributes[SENSOR_DOWNLOAD] = {
+                    "buffer_high_water_mark": self.download_sink.high_water_mark,
+                }
+
+                upload_mbps = _extract_upload_mbps(result)
+                download_mbps = _extract_download_mbps(result)
+                ping_ms = _extract_ping_ms(result)
+                # Metrics that keep their previous value: phases that missed their deadline,
+                # and an upload that stays at zero after the fallbacks.
+                stale = {sensor_type for sensor_type, phase in METRIC_PHASES if phase in ya.timed_out_phases}
+                if len(stale) == 3:
+                    raise TimeoutError("No speedtest phase finished in time")
+
+                if upload_mbps == 0 and download_mbps > 1 and SENSOR_UPLOAD not in stale:
+                    _LOGGER.warning(
+                        "Upload speed is zero while download is %.2f Mbit/s. "
+                        "Trying direct upload probe fallback first.",
+                        download_mbps,
+                    )
+
+                    fallback_deadline = timeout_at(
+                        min(deadline, asyncio.get_running_loop().time() + timeouts[PHASE_UPLOAD])
+                    )
+                    try:
+                        async with fallback_deadline:
+                            fallback = await _measure_upload_fallback(
+                                ya,
+                                self.config_entry.options.get(
+                                    CONF_UPLOAD_CONCURRENCY,
+                                    DEFAULT_UPLOAD_CONCURRENCY,
+                                ),
+                                self._payload_size(SENSOR_UPLOAD),
                             )
+                            attributes[SENSOR_UPLOAD] = fallback.as_attributes()
+                            if fallback.best_mbps > upload_mbps:
+                                upload_mbps = fallback.best_mbps
 
-                            for retry_idx in range(2):
-                                # Small cooldown gives providers a chance to finish
-                                # server-side aggregation for upload values.
-                                await asyncio.sleep(1.5)
-
-                                retry = await YaSpeedTest.create()
-                                retry_result = await retry.run()
-                                _LOGGER.debug(
-                                    "Retry #%d YaSpeedTest result payload: %s",
-                                    retry_idx + 1,
-                                    retry_result,
+                            if upload_mbps == 0:
+                                _LOGGER.warning(
+                                    "Direct upload probe fallback returned 0.00 Mbit/s. "
+                                    "Re-measuring upload only, up to %d passes.",
+                                    UPLOAD_RETRY_ATTEMPTS,
                                 )
 
-                                retry_upload = _extract_upload_mbps(
-                                    retry_result,
-                                    f"upload_retry_{retry_idx + 1}",
-                                )
-                                retry_download = _extract_download_mbps(
-                                    retry_result,
-                                    f"download_retry_{retry_idx + 1}",
+                                retry_upload = await _remeasure_upload_mbps(
+                                    ya,
+                                    self._payload_size(SENSOR_UPLOAD),
                                 )
-
                                 if retry_upload > upload_mbps:
                                     _LOGGER.info(
-                                        "Using retry upload result: current=%.2f Mbit/s retry=%.2f Mbit/s",
+                                        "Using upload re-measurement result: current=%.2f Mbit/s retry=%.2f Mbit/s",
                                         upload_mbps,
                                         retry_upload,
                                     )
                                     upload_mbps = retry_upload
+                    except TimeoutError:
+                        if not fallback_deadline.expired():
+                            raise
+                        _LOGGER.warning("Upload fallbacks did not finish in time")
+
+                    if upload_mbps == 0:
+                        previous_upload = (
+                            float(self.data.get(SENSOR_UPLOAD) or 0.0)
+                            if self.data is not None
+                            else 0.0
+                        )
+                        if previous_upload > 0:
+                            _LOGGER.warning(
+                                "Fresh upload measurement remains 0.00 Mbit/s; "
+                                "keeping previous non-zero value %.2f Mbit/s",
+                                previous_upload,
+                            )
+                            stale.add(SENSOR_UPLOAD)
+                        else:
+                            _LOGGER.warning(
+                                "Fresh upload measurement remains 0.00 Mbit/s "
+                                "and no previous non-zero value is available.",
+                            )
 
-                                if retry_download > download_mbps:
-                                    download_mbps = retry_download
+                        # Upload probes may be stale, rediscover them on the next run.
+                        self._invalidate_client()
 
-                                if upload_mbps > 0:
-                                    break
+                _LOGGER.debug(
+                    "SpeedTest results: ping=%.2f ms, download=%.2f Mbps, upload=%.2f Mbps, stale=%s",
+                    ping_ms,
+                    download_mbps,
+                    upload_mbps,
+                    sorted(stale),
+                )
+                self._record_rates(
+                    0.0 if SENSOR_DOWNLOAD in stale else download_mbps,
+                    0.0 if SENSOR_UPLOAD in stale else upload_mbps,
+                )
 
-                        if upload_mbps == 0:
-                            previous_upload = (
-                                float(self.data.get(SENSOR_UPLOAD, 0.0))
-                                if self.data is not None
-                                else 0.0
-                            )
-                            if previous_upload > 0:
-                                _LOGGER.warning(
-                                    "Fresh upload measurement remains 0.00 Mbit/s; "
-                                    "keeping previous non-zero value %.2f Mbit/s",
-                                    previous_upload,
-                                )
-                                upload_mbps = previous_upload
-                            else:
-                                _LOGGER.warning(
-                                    "Fresh upload measurement remains 0.00 Mbit/s "
-                                    "and no previous non-zero value is available.",
-                                )
+                values: dict[str, float | None] = {
+                    SENSOR_PING: ping_ms,
+                    SENSOR_DOWNLOAD: download_mbps,
+                    SENSOR_UPLOAD: upload_mbps,
+                }
+                now = dt_util.utcnow()
+                for sensor_type, phase in METRIC_PHASES:
+                    if phase in ya.partial_phases:
+                        attributes.setdefault(sensor_type, {})["partial"] = True
+                for sensor_type in values:
+                    if sensor_type not in stale:
+                        self.measured_at[sensor_type] = now
+                        continue
+                    values[sensor_type] = self.data.get(sensor_type) if self.data is not None else None
+                    stale_attributes: dict[str, object] = {"stale": True}
+                    if (measured_at := self.measured_at.get(sensor_type)) is not None:
+                        stale_attributes["measured_at"] = measured_at.isoformat()
+                        stale_attributes["age_s"] = round((now - measured_at).total_seconds())
+                    attributes.setdefault(sensor_type, {}).update(stale_attributes)
+
+                idle_ping_ms = values[SENSOR_PING]
+                loaded: dict[str, float | None] = {}
+                bufferbloat: dict[str, float] = {}
+                for sensor_type, phase in (
+                    (SENSOR_LOADED_PING_DOWNLOAD, PHASE_DOWNLOAD),
+                    (SENSOR_LOADED_PING_UPLOAD, PHASE_UPLOAD),
+                ):
+                    percentiles = _latency_percentiles(ya.loaded_latency_ms.get(phase, []))
+                    loaded[sensor_type] = percentiles.get("p50_ms")
+                    if percentiles:
+                        attributes[sensor_type] = percentiles
+                        if idle_ping_ms is not None:
+                            bufferbloat[f"{phase}_increase_ms"] = round(max(0.0, percentiles["p50_ms"] - idle_ping_ms), 1)
+                if bufferbloat:
+                    attributes[SENSOR_BUFFERBLOAT] = bufferbloat
+
+                for sensor_type, phases in (
+                    (SENSOR_PING, (PHASE_PING,)),
+                    (SENSOR_DOWNLOAD, (PHASE_DOWNLOAD,)),
+                    (SENSOR_UPLOAD, (PHASE_UPLOAD, PHASE_UPLOAD_RETRY)),
+                ):
+                    attributes.setdefault(sensor_type, {}).update(self.timings.summary(*phases))
+                for sensor_type, phase in METRIC_PHASES:
+                    attributes[sensor_type]["timeout_s"] = round(timeouts[phase], 1)
+                data = {
+                    **values,
+                    **loaded,
+                    # Worst median latency increase over idle ping across the transfer phases.
+                    SENSOR_BUFFERBLOAT: max(bufferbloat.values()) if bufferbloat else None,
+                }
+                self.attributes = attributes
+                # Stale values are not new measurements.
+                self._record_history(
+                    {**data, **dict.fromkeys(stale)},
+                    ya.transferred - start_bytes,
+                )
+                self.last_measurement = now
+                self.history.set_last_result(self.last_measurement.timestamp(), dict(data), attributes)
+                data.update(self.statistics.as_data(time.time()))
+                self.async_set_updated_data(data)
+                return data
+            
+        except TimeoutError as err:
+            self._invalidate_client()
+            self._record_history(None, ya.transferred - start_bytes if ya else 0)
+            raise UpdateFailed("Speedtest timed out") from err
+
+        except asyncio.CancelledError:
+            _LOGGER.debug("Yandex Speedtest measurement was cancelled — skipping update")
+            raise
+
+        except Exception as err:
+            self._invalidate_client()
+            self._record_history(None, ya.transferred - start_bytes if ya else 0)
+            _LOGGER.error("Error during Yandex Speedtest update: %s", err)
+            raise UpdateFailed(f"Error fetching data: {err}") from err
+
+        finally:
+            progress_task.cancel()
+            if self._client is not None:
+                self._client.start_phase(PHASE_IDLE)
+            self._async_set_progress(PHASE_IDLE, 0, 0.0)
 
+
+class YaInternetometrLatencyCoordinator(DataUpdateCoordinator):
+    """
+    A coordinator for the lightweight latency monitor.
+
+    Every `latency_interval` seconds it sends a short series of pings to the latency probe
+    of the speed test and reports min/avg/max round trip, jitter and loss. No bulk data is
+    moved, so it can run far more often than the full speed test. Runs that coincide with
+    a full test are skipped, because the transfers would distort the latency.
+
+    With the adaptive schedule enabled, average latency and loss are compared against an
+    exponentially weighted baseline. A drift beyond `ADAPTIVE_LATENCY_DRIFT` (and at least
+    `ADAPTIVE_LATENCY_MIN_DRIFT_MS`) or `ADAPTIVE_LOSS_DRIFT` triggers an early full test,
+    provided at least `ADAPTIVE_MIN_GAP` seconds have passed since the previous one.
+
+    Attributes:
+        `attributes` (dict): Extra state attributes of the last run, keyed by sensor type.
+
+    Methods:
+        `__init__`: Initializes the coordinator.
+        `_detect_drift`: Compares a sample with the baseline and updates the baseline.
+        `_async_update_data`: Sends the pings and summarizes them.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            entry: ConfigEntry,
+            speedtest: YaInternetometrDataUpdateCoordinator,
+    ) -> None:
+        """
+        Coordinator initialization.
+
+        Parameters:
+            `hass` (HomeAssistant): The main Home Assistant object.
+            `entry` (ConfigEntry): The configuration entry of the integration.
+            `speedtest` (YaInternetometrDataUpdateCoordinator): The full test coordinator that owns the client.
+        """
+
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="YaInternetometr Latency Coordinator",
+            update_interval=_latency_update_interval(entry),
+            config_entry=entry,
+        )
+        self._speedtest = speedtest
+        self.attributes: dict[str, dict[str, object]] = {}
+        self._baseline_ms: float | None = None
+        self._baseline_loss = 0.0
+        self._baseline_samples = 0
+
+    def _detect_drift(self, latency_ms: float | None, loss: float | None) -> str | None:
+        """
+        Return why the sample differs from the baseline, or None if it does not.
+
+        Samples that do not drift are folded into the baseline. A drifting sample becomes
+        the new baseline, so a lasting change triggers one full test instead of many.
+        """
+
+        if latency_ms is None or loss is None:
+            return None
+
+        if self._baseline_ms is None:
+            self._baseline_ms, self._baseline_loss, self._baseline_samples = latency_ms, loss, 1
+            return None
+
+        reason = None
+        drift_ms = abs(latency_ms - self._baseline_ms)
+        if drift_ms >= ADAPTIVE_LATENCY_MIN_DRIFT_MS and drift_ms >= self._baseline_ms * ADAPTIVE_LATENCY_DRIFT:
+            reason = f"latency {self._baseline_ms:.1f} -> {latency_ms:.1f} ms"
+        elif abs(loss - self._baseline_loss) >= ADAPTIVE_LOSS_DRIFT:
+            reason = f"loss {self._baseline_loss:.1f} -> {loss:.1f} %"
+
+        if reason is not None and self._baseline_samples >= ADAPTIVE_BASELINE_SAMPLES:
+            self._baseline_ms, self._baseline_loss, self._baseline_samples = latency_ms, loss, 1
+            return reason
+
+        self._baseline_ms += ADAPTIVE_BASELINE_ALPHA * (latency_ms - self._baseline_ms)
+        self._baseline_loss += ADAPTIVE_BASELINE_ALPHA * (loss - self._baseline_loss)
+        self._baseline_samples += 1
+        return None
+
+    async def _async_update_data(self) -> dict[str, float | None]:
+        """
+        Ping the latency probe and return the summary keyed by sensor type.
+
+        ```
+        {
+            "latency_min": <float | None>, # ms
+            "latency_avg": <float | None>, # ms
+            "latency_max": <float | None>, # ms
+            "jitter": <float | None>, # ms
+            "packet_loss": <float | None>, # percent
+        }
+        ```
+        """
+
+        if self._speedtest.test_running:
+            _LOGGER.debug("Speedtest is running — skipping latency sampling")
+            return self.data
+
+        count = self.config_entry.options.get(CONF_LATENCY_PINGS, DEFAULT_LATENCY_PINGS)
+        try:
+            ya = await self._speedtest.async_get_client()
+            samples = await ya.sample_latency(count)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            raise UpdateFailed(f"Error sampling latency: {err}") from err
+
+        data = _latency_stats(samples)
+        _LOGGER.debug(
+            "Latency: min=%s avg=%s max=%s jitter=%s loss=%s%%",
+            data[SENSOR_LATENCY_MIN],
+            data[SENSOR_LATENCY_AVG],
+            data[SENSOR_LATENCY_MAX],
+            data[SENSOR_JITTER],
+            data[SENSOR_PACKET_LOSS],
+        )
+        self.attributes = {SENSOR_PACKET_LOSS: {"sent": len(samples)}}
+
+        if self.config_entry.options.get(CONF_ADAPTIVE_SCHEDULE, DEFAULT_ADAPTIVE_SCHEDULE):
+            reason = self._detect_drift(data[SENSOR_LATENCY_AVG], data[SENSOR_PACKET_LOSS])
+            if self._baseline_ms is not None:
+                self.attributes[SENSOR_LATENCY_AVG] = {"baseline_ms": round(self._baseline_ms, 1)}
+
+            since_last = self._speedtest.seconds_since_last_run
+            if reason is not None:
+                if since_last is not None and since_last < ADAPTIVE_MIN_GAP:
                     _LOGGER.debug(
-                        "SpeedTest results: ping=%.2f ms, download=%.2f Mbps, upload=%.2f Mbps",
-                        ping_ms,
-                        download_mbps,
-                        upload_mbps,
+                        "Latency drift (%s), but the last speedtest was %.0f s ago — not triggering",
+                        reason,
+                        since_last,
                     )
-                    data = {
-                        SENSOR_PING: ping_ms,
-                        SENSOR_DOWNLOAD: download_mbps,
-                        SENSOR_UPLOAD: upload_mbps,
-                    }
-                    self.async_set_updated_data(data)
-                    return data
-                
-            except TimeoutError as err:
-                raise UpdateFailed("Speedtest timed out") from err
-
-            except asyncio.CancelledError:
-                _LOGGER.debug("Yandex Speedtest measurement was cancelled — skipping update")
-                raise
-
-            except Exception as err:
-                _LOGGER.error("Error during Yandex Speedtest update: %s", err)
-                raise UpdateFailed(f"Error fetching data: {err}") from err
+                elif not self._speedtest.scheduler.allows(dt_util.utcnow()):
+                    _LOGGER.debug("Latency drift (%s) during quiet hours or over the daily cap — not triggering", reason)
+                else:
+                    _LOGGER.info("Latency drift (%s) — starting an early speedtest", reason)
+                    self.hass.async_create_task(self._speedtest.async_request_refresh())
+
+        return data
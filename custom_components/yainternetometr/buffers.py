@@ -0,0 +1,92 @@
+# custom_components/yainternetometr/buffers.py
+
+from __future__ import annotations
+from collections.abc import AsyncIterator, Iterator
+import logging
+import mmap
+
+import aiohttp
+
+from .const import UPLOAD_CHUNK_SIZE, DOWNLOAD_CHUNK_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class UploadBuffer:
+    """
+    Preallocated zero-filled payload shared by every upload probe.
+
+    Upload probes only need a stream of zero bytes, so one anonymous mmap of
+    `chunk_size` bytes is allocated once and handed out as `memoryview` slices.
+    Untouched anonymous pages are backed by the kernel zero page, so the buffer
+    itself barely counts towards RSS, and memory use does not grow with the
+    payload size or the number of concurrent probes.
+
+    Attributes:
+        `chunk_size` (int): Size of the buffer and of every yielded chunk except the last one.
+    """
+
+    def __init__(self, chunk_size: int = UPLOAD_CHUNK_SIZE) -> None:
+        """Allocate the shared buffer."""
+        self.chunk_size = chunk_size
+        self._mmap = mmap.mmap(-1, chunk_size)
+        self._view = memoryview(self._mmap)
+
+    def chunks(self, size: int) -> Iterator[memoryview]:
+        """Yield `memoryview` slices of the buffer that add up to `size` bytes."""
+        full_chunks, tail = divmod(size, self.chunk_size)
+        for _ in range(full_chunks):
+            yield self._view
+        if tail:
+            yield self._view[:tail]
+
+    def close(self) -> None:
+        """Release the buffer. Does nothing while a transfer still holds a slice."""
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            _LOGGER.debug("Upload buffer is still in use, leaving it to the garbage collector")
+
+
+class DownloadSink:
+    """
+    Download consumer that counts response bytes and drops them right away.
+
+    Response bodies are never joined or kept. The sink takes whatever the connection has
+    buffered with `readany()` and releases it before the next read. The connection itself
+    is limited by passing `read_bufsize` to the request, so aiohttp pauses the socket once
+    roughly `chunk_size` bytes are waiting to be consumed. Memory use of a download phase
+    is therefore bounded by the chunk size, not by the size of the probe.
+
+    Attributes:
+        `chunk_size` (int): Read buffer size of every download request, in bytes.
+        `high_water_mark` (int): Most response bytes a single download stream held in memory at once since the last `reset`.
+    """
+
+    def __init__(self, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> None:
+        """Initialize the sink."""
+        self.chunk_size = chunk_size
+        self.high_water_mark = 0
+
+    @property
+    def request_kwargs(self) -> dict[str, int]:
+        """Keyword arguments that bound the read buffer of a download request."""
+        return {"read_bufsize": self.chunk_size}
+
+    def reset(self) -> None:
+        """Start a new high-water mark measurement."""
+        self.high_water_mark = 0
+
+    async def consume(self, content: aiohttp.StreamReader) -> AsyncIterator[int]:
+        """Read `content` to the end and yield the size of every chunk as it is dropped."""
+        consumed = 0
+        while chunk := await content.readany():
+            size = len(chunk)
+            # Everything the connection received but the sink has not released yet.
+            held = content.total_bytes - consumed
+            if held > self.high_water_mark:
+                self.high_water_mark = held
+            del chunk
+            consumed += size
+            yield size
@@ -10,7 +10,8 @@ from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.components.button import ButtonEntity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN, DEVICE_MANUFACTURER, DEVICE_MODEL, DEVICE_NAME, DEVICE_IDENTIFIER
+from . import device_info
+from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,7 +40,8 @@ async def async_setup_entry(
     coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
 
     async def refresh_data():
-        await coordinator.async_request_refresh()
+        # Not debounced: the press joins a running test or respects the cooldown instead.
+        await coordinator.async_refresh()
 
     buttons = [
         YaInternetometrButton(coordinator, entry, "update_speedtest", "update_now", "mdi:refresh", refresh_data)
@@ -60,12 +62,14 @@ class YaInternetometrButton(CoordinatorEntity, ButtonEntity):
         `_attr_translation_key` (str): The key for the display name in the Home Assistant interface.
         `_attr_icon` (str): button icon for the UI (Material Design Icons).
         `_attr_unique_id` (str): unique button identifier within the integration.
-        `_attr_device_info` (dict): information about the device to which the buttons are linked. Combines all buttons into a single logical device, "YaInternetometr".
+        `_attr_device_info` (dict): information about the device to which the buttons are linked. Combines all buttons into one logical device per config entry, "YaInternetometr".
 
     Methods:
         `__init__`: initializes the button, assigns attributes, and links it to the data update coordinator.
     """
 
+    _unrecorded_attributes = frozenset({"phase", "percent", "mbps"})
+
     def __init__(
             self, 
             coordinator: DataUpdateCoordinator,
@@ -84,38 +88,29 @@ class YaInternetometrButton(CoordinatorEntity, ButtonEntity):
         self._attr_unique_id = f"{entry.entry_id}_{unique_id}"
         self._default_icon = icon
         self._press_action = press_action
-        self._in_progress = False
 
         # General information about "Device" for combining all buttons
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, DEVICE_IDENTIFIER)},
-            "name": DEVICE_NAME,
-            "manufacturer": DEVICE_MANUFACTURER,
-            "model": DEVICE_MODEL,
-        }
-
-    async def async_press(self):
-        if self._in_progress or self.coordinator._update_lock.locked():
-            _LOGGER.debug("Speedtest already in progress — skipping refresh")
-            return
+        self._attr_device_info = device_info(entry)
 
-        self._in_progress = True
-        self.async_write_ha_state()
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to progress updates to show the running test in the attributes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_progress_listener(self.async_write_ha_state)
+        )
 
-        try:
-            await self._press_action()
-        finally:
-            self._in_progress = False
-            self.async_write_ha_state()
+    async def async_press(self):
+        # Presses during a running test join it, the coordinator never starts a second one.
+        await self._press_action()
 
     @property
     def available(self):
-        return not self._in_progress
+        return True
     
     @property
     def extra_state_attributes(self):
-        return {"in_progress": self._in_progress}
+        return {"in_progress": self.coordinator.test_running, **self.coordinator.progress}
     
     @property
     def icon(self):
-        return "mdi:progress-clock" if self._in_progress else self._default_icon
\ No newline at end of file
+        return "mdi:progress-clock" if self.coordinator.test_running else self._default_icon
\ No newline at end of file
@@ -0,0 +1,764 @@
+# custom_components/yainternetometr/client.py
+
+from __future__ import annotations
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+import logging
+import statistics
+import time
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.util.ssl import get_default_context
+
+from .const import HTTP_POOL_LIMIT, HTTP_DNS_CACHE_TTL, HTTP_KEEPALIVE_TIMEOUT, STREAMS_AUTO, MAX_STREAMS
+from .const import MULTISTREAM_DURATION, MULTISTREAM_WARMUP, MULTISTREAM_STEP, MULTISTREAM_PLATEAU_GAIN
+from .const import PHASE_IDLE, PHASE_PING, PHASE_DOWNLOAD, PHASE_UPLOAD, PROGRESS_PHASE_SPAN
+from .const import LOADED_PING_INTERVAL, LOADED_PING_TIMEOUT, TIMINGS_LOADED_PING, LATENCY_PING_SPACING, LATENCY_PING_TIMEOUT
+from .buffers import DownloadSink, UploadBuffer
+from .timings import RequestTimings
+from .throughput import ThroughputSampler, compute_throughput_mbps
+from yaspeedtest.client import YaSpeedTest
+from yaspeedtest.types import ProbeModel, ProbesResponse, SpeedResult, YandexAPIError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_create_session(
+        hass: HomeAssistant,
+        timings: RequestTimings,
+        source_address: str | None = None,
+) -> tuple[aiohttp.ClientSession, CALLBACK_TYPE]:
+    """
+    Create the pooled HTTP session shared by every probe of a config entry.
+
+    The session owns its own connector with keep-alive and a DNS cache, so repeated
+    probes against the same Yandex hosts skip DNS, TCP and TLS setup. It is closed
+    together with Home Assistant, and `async_unload_entry` closes it when the entry
+    is unloaded.
+
+    Parameters:
+        `hass` (HomeAssistant): The main Home Assistant object.
+        `timings` (RequestTimings): Collector that receives the trace events of every request.
+        `source_address` (str | None): Local address every connection is bound to, None for the default route.
+
+    Returns:
+        tuple: A session with the default YaSpeedTest headers, and a callback that removes its
+        close listener. Call it when the session is closed before Home Assistant stops.
+    """
+
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ssl=get_default_context(),
+        local_addr=(source_address, 0) if source_address else None,
+    )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        headers=YaSpeedTest.DEFAULT_HEADERS,
+        timeout=aiohttp.ClientTimeout(total=None),
+        trace_configs=[timings.trace_config()],
+    )
+
+    @callback
+    def _async_close_session(event: Event) -> None:
+        if not session.closed:
+            hass.async_create_task(session.close())
+
+    # Not a one-time listener, so removing it stays valid after it has fired.
+    remove_listener = hass.bus.async_listen(EVENT_HOMEASSISTANT_CLOSE, _async_close_session)
+    return session, remove_listener
+
+
+class YaInternetometrClient(YaSpeedTest):
+    """
+    YaSpeedTest client that sends every request through one shared session.
+
+    The upstream client opens a new `aiohttp.ClientSession` for every probe. This
+    subclass keeps the same measurement methods and `run()` algorithm, but routes all
+    of them through the pooled session of the config entry and tracks the progress of
+    every phase.
+
+    Attributes:
+        `session` (aiohttp.ClientSession): The pooled session created by `async_create_session`.
+        `upload_buffer` (UploadBuffer): The shared payload every upload streams its chunks from.
+        `download_sink` (DownloadSink): Counts and drops download bodies without keeping them.
+        `timings` (RequestTimings): Network timings of the requests, grouped by test phase.
+        `latency_url` (str | None): The latency probe with the best idle ping of the last run.
+        `loaded_latency_ms` (dict[str, list[float]]): Round trips measured during each transfer phase of the last run.
+        `phase` (str): The phase that is currently measured, `PHASE_IDLE` between tests.
+        `phase_fraction` (float): Completed share of the current phase, from 0 to 1.
+        `transferred` (int): Total bytes downloaded and uploaded by this client.
+        `timed_out_phases` (set[str]): Phases of the last run that missed their deadline without any finished measurement.
+        `partial_phases` (set[str]): Phases of the last run that missed their deadline, but report their finished measurements.
+        `phase_durations` (dict[str, float]): Seconds every phase of the last run took, timed out phases included.
+    """
+
+    def __init__(
+            self,
+            session: aiohttp.ClientSession,
+            upload_buffer: UploadBuffer,
+            download_sink: DownloadSink,
+            timings: RequestTimings,
+    ) -> None:
+        """Initialize the client on top of an existing session and its transfer helpers."""
+        super().__init__()
+        self.session = session
+        self.upload_buffer = upload_buffer
+        self.download_sink = download_sink
+        self.timings = timings
+        self.latency_url: str | None = None
+        self.loaded_latency_ms: dict[str, list[float]] = {}
+        self.phase = PHASE_IDLE
+        self.phase_fraction = 0.0
+        self.transferred = 0
+        self.timed_out_phases: set[str] = set()
+        self.partial_phases: set[str] = set()
+        self.phase_durations: dict[str, float] = {}
+        self._phase_timeouts: dict[str, float] = {}
+        self._deadline: float | None = None
+        self._phase_steps = 0
+        self._phase_done = 0
+
+    def start_phase(self, phase: str, steps: int = 0) -> None:
+        """Switch to `phase`, which is complete after `steps` calls to `finish_step`."""
+        self.phase = phase
+        self.timings.phase = phase
+        self.phase_fraction = 0.0
+        self._phase_steps = steps
+        self._phase_done = 0
+
+    def finish_step(self) -> None:
+        """Mark one step of the current phase as done."""
+        self._phase_done += 1
+        if self._phase_steps:
+            self.phase_fraction = min(1.0, self._phase_done / self._phase_steps)
+
+    @property
+    def percent(self) -> float:
+        """Overall test progress in percent, derived from the phase and its completed share."""
+        start, end = PROGRESS_PHASE_SPAN.get(self.phase, (0, 0))
+        return start + (end - start) * self.phase_fraction
+
+    @classmethod
+    async def create(
+            cls,
+            session: aiohttp.ClientSession,
+            upload_buffer: UploadBuffer,
+            download_sink: DownloadSink,
+            timings: RequestTimings,
+    ) -> YaInternetometrClient:
+        """Create a client and discover the available probes."""
+        self = cls(session, upload_buffer, download_sink, timings)
+        await self.async_fetch_probes()
+        return self
+
+    async def async_fetch_probes(self) -> None:
+        """
+        Fetch the probe list from the Yandex Internetometr API.
+
+        Mirrors the upstream discovery step: response headers are merged into the
+        client headers and the payload is parsed into `ProbesResponse`.
+        """
+
+        url = f"{self.base_url}/internet/api/v0/get-probes"
+
+        try:
+            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                if resp.status != 200:
+                    text = await resp.text()
+                    raise YandexAPIError(f"Process not started: {text}")
+
+                for key, value in resp.headers.items():
+                    self.headers[key] = value
+
+                data = await resp.json()
+                self.probes = ProbesResponse.model_validate(data)
+                self.mid = self.probes.mid
+                self.lid = self.probes.lid
+
+        except Exception as e:
+            raise YandexAPIError(f"Failed to start process: {e}") from e
+
+    async def measure_download(self, url: str, timeout: int = 10) -> tuple[float, int]:
+        """Download `url` and return (elapsed seconds, downloaded bytes)."""
+        timeout_config = aiohttp.ClientTimeout(total=None, connect=timeout or 10, sock_read=60)
+
+        total_bytes = 0
+        t0 = time.perf_counter()
+        try:
+            async with self.session.get(url, timeout=timeout_config, **self.download_sink.request_kwargs) as resp:
+                if resp.status != 200:
+                    return float("inf"), 0
+                async for size in self.download_sink.consume(resp.content):
+                    total_bytes += size
+                    self.transferred += size
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return float("inf"), 0
+        return time.perf_counter() - t0, total_bytes
+
+    async def measure_upload(self, url: str, size: int, timeout: int | None = None) -> tuple[float, int]:
+        """Upload `size` bytes to `url` and return (elapsed seconds, uploaded bytes)."""
+        async def gen():
+            for chunk in self.upload_buffer.chunks(size):
+                self.transferred += len(chunk)
+                yield chunk
+
+        timeout_config = aiohttp.ClientTimeout(total=None, connect=timeout or 10, sock_read=120)
+        t0 = time.perf_counter()
+        try:
+            async with self.session.post(url, data=gen(), timeout=timeout_config) as resp:
+                if resp.status != 200:
+                    return float("inf"), 0
+                await resp.read()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return float("inf"), 0
+        return time.perf_counter() - t0, size
+
+    async def measure_latency(
+        self,
+        url: str,
+        timeout: int | None = None,
+        attempts: int = 5,
+        warmup: int = 1,
+    ) -> float:
+        """
+        Measure RTT to `url` as the trimmed median of several HEAD requests.
+
+        With a pooled keep-alive connection the warmup attempt absorbs the TCP/TLS
+        handshake, so the remaining attempts measure request round trips only.
+        """
+
+        timeout_config = aiohttp.ClientTimeout(total=30, connect=timeout or 10, sock_read=1)
+        times = []
+
+        for i in range(attempts + warmup):
+            t0 = time.perf_counter()
+            try:
+                async with self.session.head(url, timeout=timeout_config) as resp:
+                    resp.release()
+                if i >= warmup:
+                    times.append((time.perf_counter() - t0) * 1000)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                if i >= warmup:
+                    times.append(10_000)
+
+            await asyncio.sleep(0.02)
+
+        if not times:
+            return float("inf")
+
+        if len(times) >= 5:
+            times_sorted = sorted(times)
+            k = max(1, len(times_sorted) // 5)
+            return statistics.median(times_sorted[:-k])
+
+        return statistics.median(times)
+
+    async def measure_download_peak(self, url: str, timeout: int = 60) -> float:
+        """
+        Measure download throughput from `url` in Mbit/s.
+
+        The name is kept for `run()`. The value is calculated from the raw chunk samples
+        by `compute_throughput_mbps`, or is the converged value if the transfer stopped early.
+        """
+
+        timeout_config = aiohttp.ClientTimeout(total=None, connect=timeout, sock_read=60)
+        samples: deque[tuple[float, int]] = deque(maxlen=200000)
+        sampler = ThroughputSampler()
+
+        try:
+            async with self.session.get(url, timeout=timeout_config, **self.download_sink.request_kwargs) as resp:
+                if resp.status != 200:
+                    return 0.0
+
+                async for size in self.download_sink.consume(resp.content):
+                    now = time.perf_counter()
+                    samples.append((now, size))
+                    sampler.add(size, now)
+                    self.transferred += size
+                    if sampler.converged:
+                        _LOGGER.debug("Download probe %s converged after %.2f s", url, sampler.elapsed)
+                        return sampler.mbps
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            _LOGGER.debug("Download probe %s failed: %s", url, err)
+            return 0.0
+
+        return compute_throughput_mbps(samples)
+
+    async def measure_upload_peak(self, url: str, size: int, timeout: int = 60) -> tuple[float, int]:
+        """
+        Measure upload throughput to `url` in Mbit/s.
+
+        The name is kept for `run()`. The value is calculated from the raw chunk samples
+        by `compute_throughput_mbps`, or is the converged value if the body ended early.
+
+        Returns:
+            tuple[float, int]: Throughput in Mbit/s and the bytes actually sent, which are
+            fewer than `size` when the body ended early. (0.0, 0) if the probe failed.
+        """
+
+        timeout_config = aiohttp.ClientTimeout(total=None, connect=timeout, sock_read=120)
+        samples: deque[tuple[float, int]] = deque(maxlen=200000)
+        sampler = ThroughputSampler()
+        sent = 0
+
+        async def gen():
+            nonlocal sent
+            for chunk in self.upload_buffer.chunks(size):
+                # Stop before the next chunk, so every sampled chunk is also sent and counted.
+                if sampler.converged:
+                    return
+                now = time.perf_counter()
+                samples.append((now, len(chunk)))
+                sampler.add(len(chunk), now)
+                self.transferred += len(chunk)
+                sent += len(chunk)
+                yield chunk
+
+        try:
+            async with self.session.post(url, data=gen(), timeout=timeout_config) as resp:
+                if resp.status != 200:
+                    return 0.0, 0
+                await resp.read()
+                # Chunks are sampled when handed to the socket buffer. The response marks
+                # the moment the server received everything, so the transfer ends here.
+                samples.append((time.perf_counter(), 0))
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            _LOGGER.debug("Upload probe %s failed: %s", url, err)
+            return 0.0, 0
+
+        if sampler.converged:
+            _LOGGER.debug("Upload probe %s converged after %.2f s and %d of %d bytes", url, sampler.elapsed, sent, size)
+            return sampler.mbps, sent
+
+        return compute_throughput_mbps(samples), sent
+
+    async def measure_ping(self, attempts: int = 5) -> float:
+        """
+        Measure ping the same way as `run()`: the best median over all latency probes.
+
+        Parameters:
+            `attempts` (int): How many `measure_latency` series are taken per probe.
+
+        Returns:
+            float: Ping in milliseconds, or 0.0 when no latency probes are available.
+        """
+
+        self.start_phase(PHASE_PING, attempts * len(self.probes.latency.probes))
+
+        async def ping_task(probe: ProbeModel) -> tuple[float, str]:
+            results = []
+            for _ in range(attempts):
+                results.append(await self.measure_latency(probe.url, probe.timeout))
+                self.finish_step()
+            results.sort()
+            return (results[len(results) // 2] if results else float("inf")), probe.url
+
+        latency_results = await asyncio.gather(
+            *(ping_task(probe) for probe in self.probes.latency.probes)
+        )
+        if not latency_results:
+            self.latency_url = None
+            return 0.0
+
+        ping_ms, self.latency_url = min(latency_results)
+        return ping_ms
+
+    async def _ping_under_load(self, samples: list[float]) -> None:
+        """Ping `latency_url` every `LOADED_PING_INTERVAL` seconds and append round trips to `samples`."""
+        timeout_config = aiohttp.ClientTimeout(total=LOADED_PING_TIMEOUT)
+        trace_ctx = {"phase": TIMINGS_LOADED_PING}
+        warmup = True
+
+        while True:
+            t0 = time.perf_counter()
+            try:
+                async with self.session.head(self.latency_url, timeout=timeout_config, trace_request_ctx=trace_ctx) as resp:
+                    resp.release()
+                rtt_ms = (time.perf_counter() - t0) * 1000
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                rtt_ms = LOADED_PING_TIMEOUT * 1000
+
+            # The first round trip may include connection setup.
+            if warmup:
+                warmup = False
+            else:
+                samples.append(rtt_ms)
+
+            await asyncio.sleep(max(0.0, LOADED_PING_INTERVAL - (time.perf_counter() - t0)))
+
+    async def sample_latency(self, count: int) -> list[float | None]:
+        """
+        Send `count` single pings to the best latency probe, `LATENCY_PING_SPACING` seconds apart.
+
+        Used by the latency monitor between full tests, so no bulk data is moved. The probe is
+        the one with the best idle ping of the last full test, or the first latency probe.
+        One warmup ping is sent first to open or refresh the pooled connection.
+
+        Returns:
+            list[float | None]: Round trips in milliseconds, None for every lost ping.
+        """
+
+        url = self.latency_url or next((probe.url for probe in self.probes.latency.probes if probe.url), None)
+        if url is None:
+            return []
+
+        timeout_config = aiohttp.ClientTimeout(total=LATENCY_PING_TIMEOUT)
+        results: list[float | None] = []
+
+        for i in range(count + 1):
+            t0 = time.perf_counter()
+            try:
+                async with self.session.head(url, timeout=timeout_config) as resp:
+                    resp.release()
+                rtt_ms = (time.perf_counter() - t0) * 1000
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                rtt_ms = None
+
+            if i:
+                results.append(rtt_ms)
+            if i < count:
+                await asyncio.sleep(LATENCY_PING_SPACING)
+
+        return results
+
+    def _set_deadlines(self, phase_timeouts: dict[str, float] | None, deadline: float | None) -> None:
+        """Start a run with new phase deadlines and forget the timed out phases of the previous one."""
+        self._phase_timeouts = phase_timeouts or {}
+        self._deadline = deadline
+        self.timed_out_phases = set()
+        self.partial_phases = set()
+        self.phase_durations = {}
+
+    @asynccontextmanager
+    async def phase_deadline(self, phase: str) -> AsyncIterator[list[float]]:
+        """
+        Stop the block once `phase` runs out of time, without failing the whole run.
+
+        The block gets `phase_timeouts[phase]` seconds, but never runs past the overall `deadline`
+        of the run. Timeouts of single requests inside the block are not affected.
+
+        The block appends every measurement to the yielded list as soon as it finishes. When the
+        phase is stopped, the run goes on with the next one and the phase is added to
+        `partial_phases` if a measurement above zero finished, to `timed_out_phases` otherwise.
+        The time the block took is stored in `phase_durations`, unless it failed.
+        """
+
+        loop = asyncio.get_running_loop()
+        limits = []
+        if phase in self._phase_timeouts:
+            limits.append(loop.time() + self._phase_timeouts[phase])
+        if self._deadline is not None:
+            limits.append(self._deadline)
+
+        started = loop.time()
+        finished: list[float] = []
+        deadline = asyncio.timeout_at(min(limits, default=None))
+        try:
+            async with deadline:
+                yield finished
+        except TimeoutError:
+            if not deadline.expired():
+                raise
+            if any(value > 0 for value in finished):
+                _LOGGER.warning(
+                    "Speedtest %s phase did not finish in time, using %d finished measurements",
+                    phase,
+                    len(finished),
+                )
+                self.partial_phases.add(phase)
+            else:
+                _LOGGER.warning("Speedtest %s phase did not finish in time, keeping its previous value", phase)
+                self.timed_out_phases.add(phase)
+        self.phase_durations[phase] = loop.time() - started
+
+    @asynccontextmanager
+    async def loaded_latency(self, phase: str) -> AsyncIterator[None]:
+        """
+        Measure latency under load while the block transfers data.
+
+        Round trips to the best latency probe are collected into `loaded_latency_ms[phase]`
+        concurrently with the transfer, so bufferbloat is measured without extra test time.
+        """
+
+        samples = self.loaded_latency_ms.setdefault(phase, [])
+        if self.latency_url is None:
+            yield
+            return
+
+        task = asyncio.create_task(self._ping_under_load(samples))
+        try:
+            yield
+        finally:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def _measure_streams(
+        self,
+        open_stream: Callable[[int, Callable[[int], None]], Awaitable[None]],
+        streams: int,
+        finished: list[float] | None = None,
+    ) -> float:
+        """
+        Run parallel transfers and measure their summed throughput over a common window.
+
+        Every stream reports transferred bytes into one shared counter. The first
+        `MULTISTREAM_WARMUP` seconds are skipped to leave TCP slow start out of the result,
+        and the window closes early once the summed throughput converges.
+
+        With `streams` set to `STREAMS_AUTO`, the method starts with one stream and adds
+        another one after every `MULTISTREAM_STEP` second window until the throughput gain
+        drops below `MULTISTREAM_PLATEAU_GAIN` or `MAX_STREAMS` is reached. Every added stream
+        gets its own `MULTISTREAM_WARMUP` before the next window, so its slow start does not
+        make the step look flat.
+
+        Parameters:
+            `open_stream`: Coroutine function running one transfer loop for the given stream index.
+            `streams` (int): Number of parallel streams or `STREAMS_AUTO`.
+            `finished` (list[float] | None): Receives the throughput of every closed window.
+
+        Returns:
+            float: Throughput in Mbit/s.
+        """
+
+        transferred = 0
+        started = time.perf_counter()
+        expected_duration = MULTISTREAM_WARMUP + MULTISTREAM_DURATION
+
+        def count(size: int) -> None:
+            nonlocal transferred
+            transferred += size
+            self.transferred += size
+
+        async def measure_window(duration: float) -> float:
+            sampler = ThroughputSampler()
+            last_bytes = transferred
+            deadline = time.perf_counter() + duration
+            sampler.add(0)
+
+            while time.perf_counter() < deadline and not sampler.converged:
+                await asyncio.sleep(sampler.slice_duration)
+                sampler.add(transferred - last_bytes)
+                last_bytes = transferred
+                self.phase_fraction = min(0.99, (time.perf_counter() - started) / expected_duration)
+
+            if finished is not None:
+                finished.append(sampler.mbps)
+            return sampler.mbps
+
+        auto = streams == STREAMS_AUTO
+        initial_streams = 1 if auto else max(1, min(streams, MAX_STREAMS))
+        tasks = [
+            asyncio.create_task(open_stream(idx, count))
+            for idx in range(initial_streams)
+        ]
+
+        try:
+            await asyncio.sleep(MULTISTREAM_WARMUP)
+
+            if not auto:
+                return await measure_window(MULTISTREAM_DURATION)
+
+            best_mbps = 0.0
+            while True:
+                mbps = await measure_window(MULTISTREAM_STEP)
+                plateau = best_mbps > 0 and mbps < best_mbps * (1 + MULTISTREAM_PLATEAU_GAIN)
+                best_mbps = max(best_mbps, mbps)
+
+                if plateau or len(tasks) >= MAX_STREAMS:
+                    _LOGGER.debug(
+                        "Throughput plateaued at %d streams: %.2f Mbit/s",
+                        len(tasks),
+                        best_mbps,
+                    )
+                    return best_mbps
+
+                tasks.append(asyncio.create_task(open_stream(len(tasks), count)))
+                await asyncio.sleep(MULTISTREAM_WARMUP)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def measure_download_multi(self, streams: int, finished: list[float] | None = None) -> float:
+        """
+        Measure download throughput with parallel streams against the download probes.
+
+        Large probes are preferred, every stream re-requests its probe in a loop until
+        the measurement window closes. `finished` receives the result of every window.
+        """
+
+        probes = [probe for probe in self.probes.download.probes if probe.url]
+        large = [probe for probe in probes if "50mb" in probe.url]
+        probes = large or probes
+        if not probes:
+            return 0.0
+
+        async def open_stream(idx: int, count: Callable[[int], None]) -> None:
+            probe = probes[idx % len(probes)]
+            timeout_config = aiohttp.ClientTimeout(total=None, connect=probe.timeout or 10, sock_read=60)
+            while True:
+                try:
+                    async with self.session.get(probe.url, timeout=timeout_config, **self.download_sink.request_kwargs) as resp:
+                        if resp.status != 200:
+                            return
+                        async for size in self.download_sink.consume(resp.content):
+                            count(size)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as err:
+                    _LOGGER.debug("Download stream #%d failed: %s", idx, err)
+                    return
+
+        return await self._measure_streams(open_stream, streams, finished)
+
+    async def measure_upload_multi(self, streams: int, finished: list[float] | None = None) -> float:
+        """
+        Measure upload throughput with parallel streams against the upload probes.
+
+        Every stream posts probe-sized payloads in a loop until the measurement window closes.
+        `finished` receives the result of every window.
+        """
+
+        probes = [probe for probe in self.probes.upload.probes if probe.url and (probe.size or 0) > 0]
+        if not probes:
+            return 0.0
+
+        async def open_stream(idx: int, count: Callable[[int], None]) -> None:
+            probe = probes[idx % len(probes)]
+            timeout_config = aiohttp.ClientTimeout(total=None, connect=probe.timeout or 10, sock_read=120)
+
+            async def gen():
+                for chunk in self.upload_buffer.chunks(probe.size):
+                    count(len(chunk))
+                    yield chunk
+
+            while True:
+                try:
+                    async with self.session.post(probe.url, data=gen(), timeout=timeout_config) as resp:
+                        if resp.status != 200:
+                            return
+                        await resp.read()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as err:
+                    _LOGGER.debug("Upload stream #%d failed: %s", idx, err)
+                    return
+
+        return await self._measure_streams(open_stream, streams, finished)
+
+    async def run_multistream(
+            self,
+            streams: int,
+            attempts: int = 5,
+            phase_timeouts: dict[str, float] | None = None,
+            deadline: float | None = None,
+    ) -> SpeedResult:
+        """
+        Measure ping, then download and upload with parallel streams.
+
+        Parameters:
+            `streams` (int): Number of parallel streams per phase or `STREAMS_AUTO`.
+            `attempts` (int): Latency series per probe, same meaning as in `run()`.
+            `phase_timeouts` (dict[str, float] | None): Seconds each phase may take, same meaning as in `run()`.
+            `deadline` (float | None): Event loop time by which every phase must be done.
+                A phase that runs out of time reports its best closed window, see `run()`.
+        """
+
+        self.loaded_latency_ms = {}
+        self._set_deadlines(phase_timeouts, deadline)
+        async with self.phase_deadline(PHASE_PING) as ping_results:
+            ping_results.append(await self.measure_ping(attempts))
+        self.start_phase(PHASE_DOWNLOAD)
+        async with self.phase_deadline(PHASE_DOWNLOAD) as download_speeds, self.loaded_latency(PHASE_DOWNLOAD):
+            download_speeds.append(await self.measure_download_multi(streams, download_speeds))
+        self.start_phase(PHASE_UPLOAD)
+        async with self.phase_deadline(PHASE_UPLOAD) as upload_speeds, self.loaded_latency(PHASE_UPLOAD):
+            upload_speeds.append(await self.measure_upload_multi(streams, upload_speeds))
+
+        return SpeedResult(
+            ping_ms=max(ping_results, default=0.0),
+            download_mbps=max(download_speeds, default=0.0),
+            upload_mbps=max(upload_speeds, default=0.0),
+        )
+
+    async def run(
+            self,
+            attempts: int = 5,
+            phase_timeouts: dict[str, float] | None = None,
+            deadline: float | None = None,
+    ) -> SpeedResult:
+        """
+        Measure ping, download and upload with the upstream single-stream algorithm.
+
+        Follows `YaSpeedTest.run()`: every probe of a phase is measured `attempts` times in
+        parallel with the other probes of the phase, and the best value is taken. The phases
+        are run here so their progress can be reported. Every attempt is collected as soon
+        as it finishes, so a phase that runs out of time still reports its best finished one.
+
+        Parameters:
+            `attempts` (int): Measurements per probe.
+            `phase_timeouts` (dict[str, float] | None): Seconds each phase may take, keyed by phase.
+                A phase that runs out of time is listed in `partial_phases` and reports its best
+                finished attempt, or is listed in `timed_out_phases` and reports 0.0 if none finished.
+            `deadline` (float | None): Event loop time by which every phase must be done.
+        """
+
+        self.loaded_latency_ms = {}
+        self._set_deadlines(phase_timeouts, deadline)
+        async with self.phase_deadline(PHASE_PING) as ping_results:
+            ping_results.append(await self.measure_ping(attempts))
+
+        download_probes = sorted(
+            (probe for probe in self.probes.download.probes if probe.url),
+            key=lambda probe: "50mb" not in probe.url,
+        )
+        self.start_phase(PHASE_DOWNLOAD, attempts * len(download_probes))
+
+        async def download_task(probe: ProbeModel, speeds: list[float]) -> None:
+            for _ in range(attempts):
+                speeds.append(await self.measure_download_peak(probe.url, probe.timeout))
+                self.finish_step()
+
+        async with self.phase_deadline(PHASE_DOWNLOAD) as download_speeds, self.loaded_latency(PHASE_DOWNLOAD):
+            await asyncio.gather(*(download_task(probe, download_speeds) for probe in download_probes))
+
+        upload_probes = [probe for probe in self.probes.upload.probes if probe.url and (probe.size or 0) > 0]
+        self.start_phase(PHASE_UPLOAD, attempts * len(upload_probes))
+
+        async def upload_task(probe: ProbeModel, speeds: list[float]) -> None:
+            for _ in range(attempts):
+                mbps, _ = await self.measure_upload_peak(probe.url, probe.size, probe.timeout)
+                speeds.append(mbps)
+                self.finish_step()
+
+        async with self.phase_deadline(PHASE_UPLOAD) as upload_speeds, self.loaded_latency(PHASE_UPLOAD):
+            await asyncio.gather(*(upload_task(probe, upload_speeds) for probe in upload_probes))
+
+        return SpeedResult(
+            ping_ms=max(ping_results, default=0.0),
+            download_mbps=max(download_speeds, default=0.0),
+            upload_mbps=max(upload_speeds, default=0.0),
+        )
@@ -1,8 +1,22 @@
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from __future__ import annotations
+
+import ipaddress
+import socket
+
+from homeassistant.config_entries import ConfigEntry, ConfigFlow, ConfigFlowResult, OptionsFlow
+from homeassistant.core import callback
 
 import voluptuous
 from typing import Any
-from .const import DOMAIN, DEFAULT_NAME
+from .const import DOMAIN, DEFAULT_NAME, CONF_UPLOAD_CONCURRENCY, DEFAULT_UPLOAD_CONCURRENCY, MIN_UPLOAD_CONCURRENCY, MAX_UPLOAD_CONCURRENCY
+from .const import CONF_STREAMS, DEFAULT_STREAMS, STREAMS_AUTO, MAX_STREAMS
+from .const import CONF_LATENCY_INTERVAL, DEFAULT_LATENCY_INTERVAL, MAX_LATENCY_INTERVAL, CONF_LATENCY_PINGS, DEFAULT_LATENCY_PINGS, MIN_LATENCY_PINGS, MAX_LATENCY_PINGS
+from .const import CONF_ADAPTIVE_SCHEDULE, DEFAULT_ADAPTIVE_SCHEDULE
+from .const import CONF_REFRESH_COOLDOWN, DEFAULT_REFRESH_COOLDOWN, MAX_REFRESH_COOLDOWN
+from .const import CONF_QUIET_HOURS, DEFAULT_QUIET_HOURS, CONF_MAX_TESTS_PER_DAY, DEFAULT_MAX_TESTS_PER_DAY, MAX_TESTS_PER_DAY
+from .const import CONF_DOWNLOAD_CHUNK_SIZE, DEFAULT_DOWNLOAD_CHUNK_SIZE_KB, MIN_DOWNLOAD_CHUNK_SIZE_KB, MAX_DOWNLOAD_CHUNK_SIZE_KB
+from .const import CONF_SOURCE_ADDRESS
+from .scheduler import parse_quiet_hours
 
 class YaInternetometrConfigFlow(ConfigFlow, domain=DOMAIN):
     """
@@ -19,13 +33,146 @@ class YaInternetometrConfigFlow(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> YaInternetometrOptionsFlow:
+        """Return the options flow handler for this integration."""
+        return YaInternetometrOptionsFlow()
+
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
-        """Handle a flow initialized by the user."""
+        """
+        Handle a flow initialized by the user.
+
+        Every entry measures one source address, so several WAN links can be tested from
+        one Home Assistant. An empty address uses the default route and is allowed once.
+        """
+
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            source_address = user_input.get(CONF_SOURCE_ADDRESS, "").strip()
+            if source_address:
+                try:
+                    source_address = str(ipaddress.ip_address(source_address))
+                except ValueError:
+                    errors[CONF_SOURCE_ADDRESS] = "invalid_source_address"
+                else:
+                    if not await self.hass.async_add_executor_job(_can_bind, source_address):
+                        errors[CONF_SOURCE_ADDRESS] = "source_address_unavailable"
+
+            if not errors:
+                if source_address:
+                    await self.async_set_unique_id(source_address)
+                    self._abort_if_unique_id_configured()
+                elif any(not entry.data.get(CONF_SOURCE_ADDRESS) for entry in self._async_current_entries()):
+                    return self.async_abort(reason="default_route_configured")
+
+                return self.async_create_entry(
+                    title=f"{DEFAULT_NAME} ({source_address})" if source_address else DEFAULT_NAME,
+                    data={CONF_SOURCE_ADDRESS: source_address},
+                )
+
+        data_schema = voluptuous.Schema({
+            voluptuous.Optional(CONF_SOURCE_ADDRESS, default=""): str,
+        })
+        return self.async_show_form(step_id="user", data_schema=data_schema, errors=errors)
 
-        if self._async_current_entries():
-            return self.async_abort(reason="single_instance_allowed")
-    
+
+def _can_bind(address: str) -> bool:
+    """Whether the address belongs to this host, so outgoing connections can use it as the source."""
+    family = socket.AF_INET6 if ipaddress.ip_address(address).version == 6 else socket.AF_INET
+    try:
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.bind((address, 0))
+    except OSError:
+        return False
+    return True
+
+
+class YaInternetometrOptionsFlow(OptionsFlow):
+    """
+    Options Flow for YaInternetometr integration.
+
+    Lets the user tune how speed tests are measured. Options that are managed by entities,
+    such as the update interval, are kept untouched when the form is saved.
+    """
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Manage the integration options."""
+
+        errors: dict[str, str] = {}
         if user_input is not None:
-            return self.async_create_entry(title=DEFAULT_NAME, data={})
+            try:
+                parse_quiet_hours(user_input.get(CONF_QUIET_HOURS, DEFAULT_QUIET_HOURS))
+            except ValueError:
+                errors[CONF_QUIET_HOURS] = "invalid_quiet_hours"
+            if (
+                user_input.get(CONF_ADAPTIVE_SCHEDULE, DEFAULT_ADAPTIVE_SCHEDULE)
+                and user_input.get(CONF_LATENCY_INTERVAL, DEFAULT_LATENCY_INTERVAL) <= 0
+            ):
+                # The adaptive schedule is driven by the latency monitor.
+                errors[CONF_ADAPTIVE_SCHEDULE] = "adaptive_needs_latency"
+            if not errors:
+                return self.async_create_entry(data={**self.config_entry.options, **user_input})
+
+        options = {**self.config_entry.options, **(user_input or {})}
+        data_schema = voluptuous.Schema({
+            voluptuous.Required(
+                CONF_STREAMS,
+                default=options.get(CONF_STREAMS, DEFAULT_STREAMS),
+            ): voluptuous.All(
+                voluptuous.Coerce(int),
+                voluptuous.Range(min=STREAMS_AUTO, max=MAX_STREAMS),
+            ),
+            voluptuous.Required(
+                CONF_UPLOAD_CONCURRENCY,
+                default=options.get(CONF_UPLOAD_CONCURRENCY, DEFAULT_UPLOAD_CONCURRENCY),
+            ): voluptuous.All(
+                voluptuous.Coerce(int),
+                voluptuous.Range(min=MIN_UPLOAD_CONCURRENCY, max=MAX_UPLOAD_CONCURRENCY),
+            ),
+            voluptuous.Required(
+                CONF_DOWNLOAD_CHUNK_SIZE,
+                default=options.get(CONF_DOWNLOAD_CHUNK_SIZE, DEFAULT_DOWNLOAD_CHUNK_SIZE_KB),
+            ): voluptuous.All(
+                voluptuous.Coerce(int),
+                voluptuous.Range(min=MIN_DOWNLOAD_CHUNK_SIZE_KB, max=MAX_DOWNLOAD_CHUNK_SIZE_KB),
+            ),
+            voluptuous.Required(
+                CONF_LATENCY_INTERVAL,
+                default=options.get(CONF_LATENCY_INTERVAL, DEFAULT_LATENCY_INTERVAL),
+            ): voluptuous.All(
+                voluptuous.Coerce(int),
+                voluptuous.Range(min=0, max=MAX_LATENCY_INTERVAL),
+            ),
+            voluptuous.Required(
+                CONF_LATENCY_PINGS,
+                default=options.get(CONF_LATENCY_PINGS, DEFAULT_LATENCY_PINGS),
+            ): voluptuous.All(
+                voluptuous.Coerce(int),
+                voluptuous.Range(min=MIN_LATENCY_PINGS, max=MAX_LATENCY_PINGS),
+            ),
+            voluptuous.Required(
+                CONF_ADAPTIVE_SCHEDULE,
+                default=options.get(CONF_ADAPTIVE_SCHEDULE, DEFAULT_ADAPTIVE_SCHEDULE),
+            ): bool,
+            voluptuous.Required(
+                CONF_REFRESH_COOLDOWN,
+                default=options.get(CONF_REFRESH_COOLDOWN, DEFAULT_REFRESH_COOLDOWN),
+            ): voluptuous.All(
+                voluptuous.Coerce(int),
+                voluptuous.Range(min=0, max=MAX_REFRESH_COOLDOWN),
+            ),
+            voluptuous.Optional(
+                CONF_QUIET_HOURS,
+                default=options.get(CONF_QUIET_HOURS, DEFAULT_QUIET_HOURS),
+            ): str,
+            voluptuous.Required(
+                CONF_MAX_TESTS_PER_DAY,
+                default=options.get(CONF_MAX_TESTS_PER_DAY, DEFAULT_MAX_TESTS_PER_DAY),
+            ): voluptuous.All(
+                voluptuous.Coerce(int),
+                voluptuous.Range(min=0, max=MAX_TESTS_PER_DAY),
+            ),
+        })
 
-        return self.async_show_form(step_id="user", data_schema=voluptuous.Schema({}))
\ No newline at end of file
+        return self.async_show_form(step_id="init", data_schema=data_schema, errors=errors)
@@ -6,7 +6,22 @@ DEFAULT_NAME = "Яндекс Интернетометр"
 SENSOR_PING = "ping"
 SENSOR_DOWNLOAD = "download"
 SENSOR_UPLOAD = "upload"
+SENSOR_PROGRESS = "progress"
+SENSOR_LAST_MEASUREMENT = "last_measurement"
+SENSOR_LOADED_PING_DOWNLOAD = "loaded_ping_download"
+SENSOR_LOADED_PING_UPLOAD = "loaded_ping_upload"
+SENSOR_BUFFERBLOAT = "bufferbloat"
+SENSOR_LATENCY_MIN = "latency_min"
+SENSOR_LATENCY_AVG = "latency_avg"
+SENSOR_LATENCY_MAX = "latency_max"
+SENSOR_JITTER = "jitter"
+SENSOR_PACKET_LOSS = "packet_loss"
 CONF_UPDATE_INTERVAL = "update_interval"
+CONF_UPLOAD_CONCURRENCY = "upload_concurrency"
+CONF_STREAMS = "streams"
+CONF_LATENCY_INTERVAL = "latency_interval"
+CONF_LATENCY_PINGS = "latency_pings"
+CONF_ADAPTIVE_SCHEDULE = "adaptive_schedule"
 
 DEVICE_MANUFACTURER = "Yandex"
 DEVICE_MODEL = "Internetometr"
@@ -18,4 +33,149 @@ MIN_SCAN_INTERVAL = 0
 MAX_SCAN_INTERVAL = 60
 STEP_SCAN_INTERVAL = 5
 
-TIMEOUT_TEST = 300
\ No newline at end of file
+TIMEOUT_TEST = 300
+
+# Probe list returned by the Yandex API is reused between runs for this many seconds
+PROBES_CACHE_TTL = 900
+
+HTTP_POOL_LIMIT = 64
+HTTP_DNS_CACHE_TTL = 300
+HTTP_KEEPALIVE_TIMEOUT = 60
+
+DEFAULT_UPLOAD_CONCURRENCY = 2
+MIN_UPLOAD_CONCURRENCY = 1
+MAX_UPLOAD_CONCURRENCY = 8
+UPLOAD_FALLBACK_STABLE_RESULTS = 2
+UPLOAD_FALLBACK_STABLE_TOLERANCE = 0.2
+
+STREAMS_AUTO = 0
+DEFAULT_STREAMS = 1
+MAX_STREAMS = 16
+MULTISTREAM_DURATION = 8.0
+MULTISTREAM_WARMUP = 2.0
+MULTISTREAM_STEP = 2.0
+MULTISTREAM_PLATEAU_GAIN = 0.1
+
+UPLOAD_RETRY_ATTEMPTS = 2
+UPLOAD_RETRY_BYTE_BUDGET = 8_000_000
+UPLOAD_RETRY_TIME_BUDGET = 20
+
+CONVERGENCE_SLICE = 0.25
+CONVERGENCE_AVERAGE_SLICES = 4
+CONVERGENCE_WINDOW_SLICES = 8
+CONVERGENCE_TOLERANCE = 0.05
+CONVERGENCE_MIN_DURATION = 2.0
+
+PAYLOAD_HISTORY_SIZE = 5
+PAYLOAD_TARGET_DURATION = 3.0
+PAYLOAD_MIN_SIZE = 256_000
+PAYLOAD_MAX_SIZE = 64_000_000
+
+THROUGHPUT_SLICE = 0.1
+THROUGHPUT_RAMP_FRACTION = 0.7
+THROUGHPUT_TRIM = 0.1
+THROUGHPUT_VECTORIZE_MIN_SAMPLES = 2048
+
+PHASE_IDLE = "idle"
+PHASE_DISCOVERY = "discovery"
+PHASE_PING = "ping"
+PHASE_DOWNLOAD = "download"
+PHASE_UPLOAD = "upload"
+PHASE_UPLOAD_RETRY = "upload_retry"
+PROGRESS_PHASE_SPAN = {
+    PHASE_DISCOVERY: (0, 5),
+    PHASE_PING: (5, 15),
+    PHASE_DOWNLOAD: (15, 55),
+    PHASE_UPLOAD: (55, 90),
+    PHASE_UPLOAD_RETRY: (90, 100),
+}
+PROGRESS_INTERVAL = 1.0
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+CONF_DOWNLOAD_CHUNK_SIZE = "download_chunk_size"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DEFAULT_DOWNLOAD_CHUNK_SIZE_KB = 64
+MIN_DOWNLOAD_CHUNK_SIZE_KB = 16
+MAX_DOWNLOAD_CHUNK_SIZE_KB = 1024
+
+# Latency probes sent while the download and upload phases transfer data
+LOADED_PING_INTERVAL = 0.25
+LOADED_PING_TIMEOUT = 2.0
+LOADED_PING_MIN_SAMPLES = 3
+TIMINGS_LOADED_PING = "loaded_ping"
+
+# Lightweight latency monitor, runs between full speed tests. Opt-in, it pings every interval around the clock
+DEFAULT_LATENCY_INTERVAL = 0
+MAX_LATENCY_INTERVAL = 3600
+DEFAULT_LATENCY_PINGS = 10
+MIN_LATENCY_PINGS = 2
+MAX_LATENCY_PINGS = 50
+LATENCY_PING_SPACING = 0.1
+LATENCY_PING_TIMEOUT = 2.0
+
+# Adaptive schedule: the latency monitor triggers full tests when latency or loss drifts
+DEFAULT_ADAPTIVE_SCHEDULE = False
+ADAPTIVE_BACKGROUND_FACTOR = 4
+ADAPTIVE_MIN_GAP = 600
+ADAPTIVE_BASELINE_ALPHA = 0.1
+ADAPTIVE_BASELINE_SAMPLES = 5
+ADAPTIVE_LATENCY_DRIFT = 0.5
+ADAPTIVE_LATENCY_MIN_DRIFT_MS = 5.0
+ADAPTIVE_LOSS_DRIFT = 5.0
+
+# Measurement history ring buffer, 32 bytes per record
+HISTORY_CAPACITY = 8192
+HISTORY_SAVE_DELAY = 60
+HISTORY_STORAGE_VERSION = 1
+
+# Rolling statistics over the measurement history: window name -> seconds
+STATISTIC_WINDOWS = {"24h": 24 * 3600, "7d": 7 * 24 * 3600}
+STATISTIC_PERCENTILES = (5, 50, 95)
+# Seconds between expiries of old values, so the statistics also age while no test runs
+STATISTIC_EXPIRE_INTERVAL = 600
+
+# Single-flight speed test: seconds after a run during which new requests get its result
+CONF_REFRESH_COOLDOWN = "refresh_cooldown"
+DEFAULT_REFRESH_COOLDOWN = 60
+MAX_REFRESH_COOLDOWN = 3600
+
+# Seconds a new update interval from the number entity waits before it is written to the entry
+UPDATE_INTERVAL_SAVE_DELAY = 5
+
+# Scheduler of full tests: quiet-hours windows in local time, daily cap (0 = no cap)
+CONF_QUIET_HOURS = "quiet_hours"
+DEFAULT_QUIET_HOURS = ""
+CONF_MAX_TESTS_PER_DAY = "max_tests_per_day"
+DEFAULT_MAX_TESTS_PER_DAY = 0
+MAX_TESTS_PER_DAY = 288
+SCHEDULE_HORIZON = 8 * 24 * 3600
+
+# Config entry data: local address outgoing test connections are bound to, empty for the default route
+CONF_SOURCE_ADDRESS = "source_address"
+
+# Full tests of all config entries share one semaphore, so links are never measured at the same time
+DATA_TEST_SEMAPHORE = "test_semaphore"
+
+# Measurement histories by entry id. They outlive an unload, so a removed entry is deleted through the instance that saved it
+DATA_HISTORIES = "histories"
+MAX_CONCURRENT_TESTS = 1
+
+# Per-phase deadlines, seconds. A phase that misses its deadline reports its best finished measurement,
+# or keeps its last value as stale if none finished.
+# Phases also end before TIMEOUT_TEST minus the margin, which is left for the upload fallbacks and publishing.
+# These are the ceilings of the adaptive timeouts below.
+PHASE_TIMEOUTS = {PHASE_PING: 30, PHASE_DOWNLOAD: 120, PHASE_UPLOAD: 120}
+TEST_PUBLISH_MARGIN = 10
+
+# Adaptive phase timeouts: percentile of recent phase durations times a safety factor, clamped to floor and ceiling.
+# A missed deadline multiplies the timeout by the factor until the phase finishes in time again.
+PHASE_DURATION_HISTORY = 20
+PHASE_TIMEOUT_MIN_SAMPLES = 5
+PHASE_TIMEOUT_PERCENTILE = 95
+PHASE_TIMEOUT_FACTOR = 2.0
+PHASE_TIMEOUT_FLOOR = {PHASE_PING: 5, PHASE_DOWNLOAD: 15, PHASE_UPLOAD: 15}
+DISCOVERY_TIMEOUT = 30
+
+# Test phase that measures each main metric
+METRIC_PHASES = ((SENSOR_PING, PHASE_PING), (SENSOR_DOWNLOAD, PHASE_DOWNLOAD), (SENSOR_UPLOAD, PHASE_UPLOAD))
\ No newline at end of file
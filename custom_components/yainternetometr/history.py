@@ -0,0 +1,160 @@
+# custom_components/yainternetometr/history.py
+
+from __future__ import annotations
+from array import array
+import base64
+from collections.abc import Iterator
+import logging
+import math
+import sys
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, HISTORY_CAPACITY, HISTORY_SAVE_DELAY, HISTORY_STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+# Column name -> array typecode. Metrics are single precision, missing values are NaN.
+HISTORY_COLUMNS = {
+    "timestamp": "d",
+    "ping": "f",
+    "download": "f",
+    "upload": "f",
+    "duration": "f",
+    "bytes": "Q",
+}
+
+
+class MeasurementHistory:
+    """
+    Fixed-capacity ring buffer of speed test results, persisted with the storage helper.
+
+    Every column is a preallocated `array.array`, so a record costs 32 bytes in memory
+    and the oldest record is overwritten once `capacity` is reached. Columns are stored
+    as base64 encoded raw arrays, which keeps a full buffer of `HISTORY_CAPACITY` records
+    at a few hundred KB on disk. Writes are debounced by `HISTORY_SAVE_DELAY` seconds.
+
+    The full result of the last successful run is stored next to the records, so the
+    sensors can be restored as they were before a restart.
+
+    Attributes:
+        `capacity` (int): Maximum number of records kept.
+        `last_result` (dict | None): Timestamp, data and attributes of the last successful run.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, capacity: int = HISTORY_CAPACITY) -> None:
+        """Initialize an empty history of the config entry `entry_id`."""
+        self.capacity = capacity
+        self._store: Store[dict] = Store(hass, HISTORY_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.history")
+        self._columns = {name: array(code, [0]) * capacity for name, code in HISTORY_COLUMNS.items()}
+        self._next = 0
+        self._count = 0
+        self.last_result: dict | None = None
+
+    def __len__(self) -> int:
+        """Number of records in the buffer."""
+        return self._count
+
+    def append(
+            self,
+            timestamp: float,
+            ping: float | None,
+            download: float | None,
+            upload: float | None,
+            duration: float,
+            transferred: int,
+    ) -> None:
+        """Add a record, overwriting the oldest one when the buffer is full, and schedule a save."""
+        self._put(
+            timestamp=timestamp,
+            ping=math.nan if ping is None else ping,
+            download=math.nan if download is None else download,
+            upload=math.nan if upload is None else upload,
+            duration=duration,
+            bytes=transferred,
+        )
+        self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+
+    def set_last_result(self, timestamp: float, data: dict, attributes: dict) -> None:
+        """Remember the full result of a successful run and schedule a save."""
+        self.last_result = {"timestamp": timestamp, "data": data, "attributes": attributes}
+        self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+
+    def _put(self, **values: float | int) -> None:
+        """Write one record at the head of the ring."""
+        for name, value in values.items():
+            self._columns[name][self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def _order(self) -> Iterator[int]:
+        """Yield buffer indexes from the oldest record to the newest one."""
+        start = (self._next - self._count) % self.capacity
+        for offset in range(self._count):
+            yield (start + offset) % self.capacity
+
+    def column(self, name: str) -> list[float]:
+        """Return one column in chronological order. Missing metrics are NaN."""
+        values = self._columns[name]
+        return [values[idx] for idx in self._order()]
+
+    def count_since(self, timestamp: float) -> int:
+        """Count the records at or after `timestamp`, walking back from the newest one."""
+        timestamps = self._columns["timestamp"]
+        count = 0
+        for offset in range(1, self._count + 1):
+            if timestamps[(self._next - offset) % self.capacity] < timestamp:
+                break
+            count += 1
+        return count
+
+    def rows(self) -> Iterator[dict[str, float]]:
+        """Yield records as dicts in chronological order."""
+        for idx in self._order():
+            yield {name: values[idx] for name, values in self._columns.items()}
+
+    async def async_load(self) -> None:
+        """Load the persisted records. Unreadable data is logged and ignored."""
+        stored = await self._store.async_load()
+        if not stored:
+            return
+
+        self.last_result = stored.get("last_result")
+        try:
+            columns = {}
+            for name, code in HISTORY_COLUMNS.items():
+                values = array(code)
+                values.frombytes(base64.b64decode(stored["columns"][name]))
+                if stored["byteorder"] != sys.byteorder:
+                    values.byteswap()
+                columns[name] = values
+            count = len(columns["timestamp"])
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Discarding unreadable measurement history: %s", err)
+            return
+
+        # Keep the newest records if the capacity was reduced since the last save.
+        for idx in range(max(0, count - self.capacity), count):
+            self._put(**{name: values[idx] for name, values in columns.items()})
+        _LOGGER.debug("Loaded %d history records", self._count)
+
+    async def async_flush(self) -> None:
+        """Write the records now instead of after the debounce delay, which is cancelled."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Delete the persisted history. A pending debounced save is cancelled, so it cannot recreate the file."""
+        await self._store.async_remove()
+
+    def _data_to_save(self) -> dict:
+        """Serialize the records in chronological order."""
+        order = list(self._order())
+        return {
+            "last_result": self.last_result,
+            "byteorder": sys.byteorder,
+            "columns": {
+                name: base64.b64encode(array(values.typecode, (values[idx] for idx in order)).tobytes()).decode()
+                for name, values in self._columns.items()
+            },
+        }
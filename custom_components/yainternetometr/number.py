@@ -1,16 +1,17 @@
 from __future__ import annotations
 import logging
 
-from datetime import timedelta
 from homeassistant.components.number import NumberEntity
 from homeassistant.const import UnitOfTime
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.helpers.restore_state import RestoreEntity
 
-from .const import DOMAIN, CONF_UPDATE_INTERVAL, DEFAULT_SCAN_INTERVAL, MAX_SCAN_INTERVAL, MIN_SCAN_INTERVAL, STEP_SCAN_INTERVAL, DEVICE_MANUFACTURER, DEVICE_MODEL, DEVICE_NAME, DEVICE_IDENTIFIER
+from . import device_info
+from .const import DOMAIN, CONF_UPDATE_INTERVAL, DEFAULT_SCAN_INTERVAL, MAX_SCAN_INTERVAL, MIN_SCAN_INTERVAL, STEP_SCAN_INTERVAL, UPDATE_INTERVAL_SAVE_DELAY
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -58,10 +59,14 @@ class YaInternetometrNumber(NumberEntity, RestoreEntity):
         `_attr_translation_key` (str): The key for the display name in the Home Assistant interface.
         `_attr_icon` (str): number icon for the UI (Material Design Icons).
         `_attr_unique_id` (str): unique number identifier within the integration.
-        `_attr_device_info` (dict): information about the device to which the numbers are linked. Combines all numbers into a single logical device, "YaInternetometr".
+        `_attr_device_info` (dict): information about the device to which the numbers are linked. Combines all numbers into one logical device per config entry, "YaInternetometr".
 
     Methods:
         `__init__`: initializes the number, assigns attributes, and links it to the data update coordinator.
+        `async_set_native_value`: applies the interval to the coordinator and schedules the write to the entry.
+        `_async_save_interval`: writes the interval to the config entry options.
+        `async_added_to_hass`: restores the last interval.
+        `async_will_remove_from_hass`: writes a pending interval before the entity goes away.
     """
         
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry, coordinator: DataUpdateCoordinator):
@@ -78,6 +83,7 @@ class YaInternetometrNumber(NumberEntity, RestoreEntity):
         self.entry = entry
         self.coordinator = coordinator
         self._attr_unique_id = f"{entry.entry_id}_update_interval"
+        self._cancel_save: CALLBACK_TYPE | None = None
 
         self._attr_native_value = entry.options.get(
             CONF_UPDATE_INTERVAL,
@@ -85,34 +91,44 @@ class YaInternetometrNumber(NumberEntity, RestoreEntity):
         )
 
         # General information about "Device" for combining all numbers
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, DEVICE_IDENTIFIER)},
-            "name": DEVICE_NAME,
-            "manufacturer": DEVICE_MANUFACTURER,
-            "model": DEVICE_MODEL,
-        }
+        self._attr_device_info = device_info(entry)
 
     async def async_set_native_value(self, value: float) -> None:
+        """
+        Apply a new interval to the coordinator at once and persist it once the value settles.
+
+        Dragging the slider sends a value for every step, so the entry is written only after
+        `UPDATE_INTERVAL_SAVE_DELAY` seconds without changes. The next test is rescheduled
+        by the coordinator, no test is started.
+        """
+
         minutes = int(value)
 
         self._attr_native_value = minutes
+        self.coordinator.set_scan_interval(minutes)
+        self.async_write_ha_state()
 
-        if minutes == 0:
-            self.coordinator.update_interval = None
-        else:
-            self.coordinator.update_interval = timedelta(minutes=minutes)
+        if self._cancel_save is not None:
+            self._cancel_save()
+        self._cancel_save = async_call_later(self.hass, UPDATE_INTERVAL_SAVE_DELAY, self._async_save_interval)
+
+    @callback
+    def _async_save_interval(self, _now=None) -> None:
+        """Write the current interval to the config entry options."""
+        self._cancel_save = None
+        if self.entry.options.get(CONF_UPDATE_INTERVAL) == self._attr_native_value:
+            return
 
         self.hass.config_entries.async_update_entry(
             self.entry,
             options={
                 **self.entry.options, 
-                CONF_UPDATE_INTERVAL: minutes
+                CONF_UPDATE_INTERVAL: self._attr_native_value
             },
         )
 
-        await self.coordinator.async_request_refresh()
-    
     async def async_added_to_hass(self):
+        """Restore the last interval. A restored 0 keeps scheduled tests disabled."""
         await super().async_added_to_hass()
 
         if (state := await self.async_get_last_state()):
@@ -122,4 +138,11 @@ class YaInternetometrNumber(NumberEntity, RestoreEntity):
                 return
 
             self._attr_native_value = value
-            self.coordinator.update_interval = timedelta(minutes=value)
\ No newline at end of file
+            self.coordinator.set_scan_interval(value)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Write an interval that is still waiting for its debounced save."""
+        if self._cancel_save is not None:
+            self._cancel_save()
+            self._async_save_interval()
+        await super().async_will_remove_from_hass()
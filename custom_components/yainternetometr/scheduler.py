@@ -0,0 +1,218 @@
+# custom_components/yainternetometr/scheduler.py
+
+from __future__ import annotations
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+import logging
+import math
+import random
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import CONF_QUIET_HOURS, DEFAULT_QUIET_HOURS, CONF_MAX_TESTS_PER_DAY, DEFAULT_MAX_TESTS_PER_DAY, SCHEDULE_HORIZON
+
+if TYPE_CHECKING:
+    from . import YaInternetometrDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=8)
+def parse_quiet_hours(value: str) -> tuple[tuple[time, time], ...]:
+    """
+    Parse quiet-hours windows such as `09:00-18:00, 23:30-01:00` in local time.
+
+    A window may wrap around midnight. Raises ValueError for a malformed or empty window.
+    """
+
+    windows = []
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        start, separator, end = part.partition("-")
+        if not separator:
+            raise ValueError(f"Quiet-hours window {part.strip()!r} has no end")
+        window = (
+            datetime.strptime(start.strip(), "%H:%M").time(),
+            datetime.strptime(end.strip(), "%H:%M").time(),
+        )
+        if window[0] == window[1]:
+            raise ValueError(f"Quiet-hours window {part.strip()!r} is empty")
+        windows.append(window)
+    return tuple(windows)
+
+
+def in_quiet_hours(moment: time, windows: tuple[tuple[time, time], ...]) -> bool:
+    """Whether a local time of day falls into one of the windows. Window ends are not quiet."""
+    for start, end in windows:
+        if start < end:
+            if start <= moment < end:
+                return True
+        elif moment >= start or moment < end:
+            return True
+    return False
+
+
+class TestScheduler:
+    """
+    Wall-clock scheduler of the full speed test, used instead of the coordinator update interval.
+
+    Scheduled tests run on a grid of `interval` steps counted from the Unix epoch and shifted by
+    a phase offset. The offset is a fraction of the interval seeded by the config entry id, so
+    it is random per install but stable across restarts. Installs with the same interval are
+    spread over the whole interval instead of testing at the same moment after boot.
+
+    A grid slot is skipped when it falls into the quiet hours, when the daily cap is already
+    reached on its local day, or when the last result is less than half an interval old at
+    that time. Every test in the measurement history counts towards the cap, manual ones too,
+    but only scheduled and adaptive tests are held back by it.
+
+    Attributes:
+        `interval` (timedelta | None): Step of the grid, None when scheduled tests are disabled.
+        `phase_offset` (float): Shift of the grid as a fraction of the interval.
+        `next_run` (datetime | None): When the next scheduled test starts, None if none is scheduled.
+
+    Methods:
+        `set_interval`: Changes the grid step and reschedules.
+        `async_start`: Starts scheduling, right away if there is no result yet.
+        `async_stop`: Cancels the pending test.
+        `reschedule`: Recomputes the next test, for example after the options changed.
+        `allows`: Checks the quiet hours and the daily cap for a moment.
+        `next_slot`: Returns the first allowed grid slot after a moment.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            coordinator: YaInternetometrDataUpdateCoordinator,
+            interval: timedelta | None,
+    ) -> None:
+        """
+        Scheduler initialization.
+
+        Parameters:
+            `hass` (HomeAssistant): The main Home Assistant object.
+            `coordinator` (YaInternetometrDataUpdateCoordinator): The coordinator whose tests are scheduled.
+            `interval` (timedelta | None): Interval of scheduled tests, None to disable them.
+        """
+
+        self.hass = hass
+        self._coordinator = coordinator
+        self.interval = interval
+        self.phase_offset = random.Random(coordinator.config_entry.entry_id).random()
+        self.next_run: datetime | None = None
+        self._started = False
+        self._unsub: CALLBACK_TYPE | None = None
+        self._invalid_quiet_hours: str | None = None
+
+    def set_interval(self, interval: timedelta | None) -> None:
+        """Change the interval. The next test moves to the new grid, no test is started."""
+        if interval == self.interval:
+            return
+        self.interval = interval
+        self.reschedule()
+
+    @callback
+    def async_start(self) -> None:
+        """Start scheduling. Without a restored result the first test runs right away, if allowed."""
+        self._started = True
+        now = dt_util.utcnow()
+        if self.interval is not None and self._coordinator.last_measurement is None and self.allows(now):
+            self._async_fire(now)
+            return
+        self.reschedule()
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop scheduling and cancel the pending test."""
+        self._started = False
+        self._cancel()
+
+    @callback
+    def reschedule(self) -> None:
+        """Cancel the pending test and schedule the next allowed slot."""
+        self._cancel()
+        if not self._started:
+            return
+
+        self.next_run = self.next_slot(dt_util.utcnow())
+        if self.next_run is None:
+            if self.interval is not None:
+                _LOGGER.warning("No speedtest slot is allowed by the quiet hours within %d days", SCHEDULE_HORIZON // 86400)
+            return
+        _LOGGER.debug("Next speedtest at %s", dt_util.as_local(self.next_run))
+        self._unsub = async_track_point_in_utc_time(self.hass, self._async_fire, self.next_run)
+
+    def allows(self, when: datetime) -> bool:
+        """Whether a scheduled or adaptive test may start at `when`: outside the quiet hours and below the daily cap."""
+        options = self._coordinator.config_entry.options
+        local = dt_util.as_local(when)
+
+        quiet_hours = options.get(CONF_QUIET_HOURS, DEFAULT_QUIET_HOURS)
+        try:
+            windows = parse_quiet_hours(quiet_hours)
+        except ValueError as err:
+            if quiet_hours != self._invalid_quiet_hours:
+                _LOGGER.warning("Ignoring invalid quiet hours: %s", err)
+                self._invalid_quiet_hours = quiet_hours
+            windows = ()
+        if in_quiet_hours(local.time(), windows):
+            return False
+
+        cap = options.get(CONF_MAX_TESTS_PER_DAY, DEFAULT_MAX_TESTS_PER_DAY)
+        if cap <= 0:
+            return True
+        day_start = dt_util.start_of_local_day(local)
+        return self._coordinator.history.count_since(day_start.timestamp()) < cap
+
+    def next_slot(self, now: datetime) -> datetime | None:
+        """Return the first allowed grid slot after `now`, None if there is none within `SCHEDULE_HORIZON` seconds."""
+        if self.interval is None:
+            return None
+
+        step = self.interval.total_seconds()
+        offset = self.phase_offset * step
+        slot = (math.floor((now.timestamp() - offset) / step) + 1) * step + offset
+        last = self._coordinator.last_measurement
+        earliest = last.timestamp() + step / 2 if last is not None else slot
+        horizon = now.timestamp() + SCHEDULE_HORIZON
+
+        while slot <= horizon:
+            when = dt_util.utc_from_timestamp(slot)
+            if slot >= earliest and self.allows(when):
+                return when
+            slot += step
+        return None
+
+    @callback
+    def _cancel(self) -> None:
+        """Cancel the pending test, if any."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        self.next_run = None
+
+    @callback
+    def _async_fire(self, now: datetime) -> None:
+        """
+        Start the scheduled test, unless it is no longer allowed.
+
+        The slot was checked when it was scheduled, but manual tests may have reached the
+        daily cap since then, so the limits are checked again and the next slot is taken instead.
+        """
+        self._unsub = None
+        if not self.allows(now):
+            _LOGGER.debug("Skipping the speedtest at %s, it is no longer allowed", dt_util.as_local(now))
+            self.reschedule()
+            return
+        self.hass.async_create_background_task(self._async_run(), "yainternetometr scheduled speedtest")
+
+    async def _async_run(self) -> None:
+        """Run the test through the coordinator, then schedule the next one."""
+        try:
+            await self._coordinator.async_refresh()
+        finally:
+            self.reschedule()
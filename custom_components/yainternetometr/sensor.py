@@ -5,12 +5,21 @@ import logging
 
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
+from homeassistant.const import PERCENTAGE, EntityCategory
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN, SENSOR_PING, SENSOR_DOWNLOAD, SENSOR_UPLOAD, DEVICE_MANUFACTURER, DEVICE_MODEL, DEVICE_NAME, DEVICE_IDENTIFIER
+from . import device_info
+from .const import STATISTIC_WINDOWS, STATISTIC_PERCENTILES, SENSOR_LAST_MEASUREMENT
+from .const import SENSOR_LATENCY_MIN, SENSOR_LATENCY_AVG, SENSOR_LATENCY_MAX, SENSOR_JITTER, SENSOR_PACKET_LOSS
+from .const import SENSOR_LOADED_PING_DOWNLOAD, SENSOR_LOADED_PING_UPLOAD, SENSOR_BUFFERBLOAT
+from .const import DOMAIN, SENSOR_PING, SENSOR_DOWNLOAD, SENSOR_UPLOAD, SENSOR_PROGRESS
+from .const import CONF_LATENCY_INTERVAL, DEFAULT_LATENCY_INTERVAL
+
+from .stats import statistic_key
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,12 +47,22 @@ async def async_setup_entry(
             - Ping: Network response time in milliseconds.
             - Download: Download speed in Mbps.
             - Upload: upload speed in Mbit/s.
+        - Creates latency-under-load sensors: median ping during download and upload,
+        and bufferbloat, the increase of loaded latency over idle ping.
+        - Creates latency monitor sensors (min/avg/max ping, jitter and loss), updated by the
+        lightweight latency coordinator between full tests. They exist only while the monitor
+        is enabled, otherwise their registry entries are removed, so no sensor stays unknown.
+        - Creates rolling statistics sensors for every window in `STATISTIC_WINDOWS`: mean ping
+        and the `STATISTIC_PERCENTILES` of download and upload.
+        - Creates a diagnostic progress sensor for the running test.
         - Each sensor is assigned:
             - name,
             - data type for state_class and device_class,
             - units of measurement,
             - icon for display in the interface.
-        - Registers sensors via `async_add_entities`, ensuring that values ​​are updated before the first display (`update_before_add=True`).
+        - Creates a last measurement timestamp sensor, which shows the age of the results.
+        - Registers sensors via `async_add_entities`. Values come from the coordinator, which restores the last
+        results at startup, so no update is requested before the first display.
         - Logs the number of created sensors for debugging.
 
     Returns:
@@ -51,13 +70,46 @@ async def async_setup_entry(
     """
 
     coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    latency_coordinator = hass.data[DOMAIN][entry.entry_id]["latency_coordinator"]
     sensors = [
         YaInternetometrSensor(coordinator, entry, SENSOR_PING, SENSOR_PING, None, "ms", "mdi:cloud-refresh-variant", 0),
         YaInternetometrSensor(coordinator, entry, SENSOR_DOWNLOAD, SENSOR_DOWNLOAD, "data_rate", "Mbit/s", "mdi:cloud-download", 2),
         YaInternetometrSensor(coordinator, entry, SENSOR_UPLOAD, SENSOR_UPLOAD, "data_rate", "Mbit/s", "mdi:cloud-upload", 2),
+        YaInternetometrSensor(coordinator, entry, SENSOR_LOADED_PING_DOWNLOAD, SENSOR_LOADED_PING_DOWNLOAD, None, "ms", "mdi:timer-arrow-down", 0),
+        YaInternetometrSensor(coordinator, entry, SENSOR_LOADED_PING_UPLOAD, SENSOR_LOADED_PING_UPLOAD, None, "ms", "mdi:timer-arrow-up", 0),
+        YaInternetometrSensor(coordinator, entry, SENSOR_BUFFERBLOAT, SENSOR_BUFFERBLOAT, None, "ms", "mdi:timer-alert", 0),
+        YaInternetometrProgressSensor(coordinator, entry),
+        YaInternetometrLastMeasurementSensor(coordinator, entry),
+    ]
+    latency_sensors = [
+        YaInternetometrSensor(latency_coordinator, entry, SENSOR_LATENCY_MIN, SENSOR_LATENCY_MIN, None, "ms", "mdi:timer-outline", 1),
+        YaInternetometrSensor(latency_coordinator, entry, SENSOR_LATENCY_AVG, SENSOR_LATENCY_AVG, None, "ms", "mdi:timer-outline", 1),
+        YaInternetometrSensor(latency_coordinator, entry, SENSOR_LATENCY_MAX, SENSOR_LATENCY_MAX, None, "ms", "mdi:timer-outline", 1),
+        YaInternetometrSensor(latency_coordinator, entry, SENSOR_JITTER, SENSOR_JITTER, None, "ms", "mdi:chart-bell-curve", 1),
+        YaInternetometrSensor(latency_coordinator, entry, SENSOR_PACKET_LOSS, SENSOR_PACKET_LOSS, None, PERCENTAGE, "mdi:package-variant-remove", 0),
     ]
+    if entry.options.get(CONF_LATENCY_INTERVAL, DEFAULT_LATENCY_INTERVAL) > 0:
+        sensors.extend(latency_sensors)
+    else:
+        # The monitor is off, drop the entities an earlier setup registered.
+        registry = er.async_get(hass)
+        for sensor in latency_sensors:
+            if entity_id := registry.async_get_entity_id("sensor", DOMAIN, sensor.unique_id):
+                registry.async_remove(entity_id)
+
+    for window in STATISTIC_WINDOWS:
+        sensors.append(YaInternetometrSensor(
+            coordinator, entry, statistic_key(SENSOR_PING, "mean", window), "ping_mean",
+            None, "ms", "mdi:chart-line", 1, {"window": window},
+        ))
+        for metric, icon in ((SENSOR_DOWNLOAD, "mdi:cloud-download-outline"), (SENSOR_UPLOAD, "mdi:cloud-upload-outline")):
+            for percent in STATISTIC_PERCENTILES:
+                sensors.append(YaInternetometrSensor(
+                    coordinator, entry, statistic_key(metric, f"p{percent}", window), f"{metric}_percentile",
+                    "data_rate", "Mbit/s", icon, 2, {"percentile": f"p{percent}", "window": window},
+                ))
 
-    async_add_entities(sensors, update_before_add=True)
+    async_add_entities(sensors)
     _LOGGER.debug("Created %d sensors YaInternetometr", len(sensors))
 
 
@@ -74,16 +126,18 @@ class YaInternetometrSensor(CoordinatorEntity, SensorEntity):
         `coordinator`: A YaInternetometrDataUpdateCoordinator instance, providing up-to-date ping, download, and upload values.
         `sensor_type` (str): The metric type corresponding to the key in `coordinator.data`. For example, "ping", "download", "upload".
         `_attr_translation_key` (str): The key for the display name in the Home Assistant interface.
+        `_attr_translation_placeholders` (dict): Values for the placeholders in the translated name, for example the statistics window.
         `_attr_state_class` (str): Specifies that the sensor measures a continuous value ("measurement"), to support history and graphs.
         `_attr_native_unit_of_measurement` (str): Units of measurement, for example, "ms" or "Mbit/s".
         `_attr_icon` (str): sensor icon for the UI (Material Design Icons).
         `_attr_unique_id` (str): unique sensor identifier within the integration.
         `_attr_device_class` (str | None): standard Home Assistant device class for correctly displaying the data type (e.g., "data_rate").
-        `_attr_device_info` (dict): information about the device to which the sensors are linked. Combines all sensors into a single logical device, "YaInternetometr".
+        `_attr_device_info` (dict): information about the device to which the sensors are linked. Combines all sensors into one logical device per config entry, "YaInternetometr".
 
     Methods:
         `__init__`: initializes the sensor, assigns attributes, and links it to the data update coordinator.
         `native_value` (property): returns the current metric value from coordinator.data. Rounding and processing can be added here.
+        `extra_state_attributes` (property): returns the attributes the coordinator collected for this metric during the last run.
     """
 
     def __init__(
@@ -96,6 +150,7 @@ class YaInternetometrSensor(CoordinatorEntity, SensorEntity):
             unit: str, 
             icon: str,
             suggested_display_precision: int | None = None,
+            translation_placeholders: dict[str, str] | None = None,
     ):
         """Initializing the YaInternetometr sensor."""
         super().__init__(coordinator)
@@ -104,6 +159,8 @@ class YaInternetometrSensor(CoordinatorEntity, SensorEntity):
         self._attr_has_entity_name = True
         self.sensor_type = sensor_type
         self._attr_translation_key = translation_key
+        if translation_placeholders:
+            self._attr_translation_placeholders = translation_placeholders
         self._attr_state_class = "measurement"
         self._attr_native_unit_of_measurement = unit
         self._attr_icon = icon
@@ -118,12 +175,7 @@ class YaInternetometrSensor(CoordinatorEntity, SensorEntity):
             self._attr_device_class = device_call
 
         # General information about "Device" for combining all sensors
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, DEVICE_IDENTIFIER)},
-            "name": DEVICE_NAME,
-            "manufacturer": DEVICE_MANUFACTURER,
-            "model": DEVICE_MODEL,
-        }
+        self._attr_device_info = device_info(entry)
 
     @property
     def native_value(self):
@@ -135,4 +187,82 @@ class YaInternetometrSensor(CoordinatorEntity, SensorEntity):
             return round(value, 2)
             ```
         """
-        return self.coordinator.data.get(self.sensor_type) if self.coordinator.data else None
\ No newline at end of file
+        return self.coordinator.data.get(self.sensor_type) if self.coordinator.data else None
+
+    @property
+    def extra_state_attributes(self):
+        """Returns extra attributes of the last run for this metric, for example upload fallback details."""
+        return self.coordinator.attributes.get(self.sensor_type)
+
+
+class YaInternetometrProgressSensor(CoordinatorEntity, SensorEntity):
+    """
+    Diagnostic sensor with the progress of the running speed test.
+
+    The state is the percent done. The current phase and the instantaneous throughput are
+    exposed as attributes. Values come from the coordinator progress channel, which is
+    published at most once per `PROGRESS_INTERVAL`, and are not written to the recorder.
+    """
+
+    _unrecorded_attributes = frozenset({"phase", "mbps"})
+
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry):
+        """Initializing the YaInternetometr progress sensor."""
+        super().__init__(coordinator)
+
+        self._attr_has_entity_name = True
+        self._attr_translation_key = SENSOR_PROGRESS
+        self._attr_native_unit_of_measurement = PERCENTAGE
+        self._attr_icon = "mdi:progress-download"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_unique_id = f"{entry.entry_id}_{SENSOR_PROGRESS}"
+
+        # General information about "Device" for combining all sensors
+        self._attr_device_info = device_info(entry)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to progress updates in addition to coordinator data updates."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_progress_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def native_value(self):
+        """Returns the percent done of the running test, 0 between tests."""
+        return self.coordinator.progress["percent"]
+
+    @property
+    def extra_state_attributes(self):
+        """Returns the current phase and the instantaneous throughput in Mbit/s."""
+        return {
+            "phase": self.coordinator.progress["phase"],
+            "mbps": self.coordinator.progress["mbps"],
+        }
+
+
+class YaInternetometrLastMeasurementSensor(CoordinatorEntity, SensorEntity):
+    """
+    Timestamp of the last successful speed test.
+
+    Home Assistant shows timestamp sensors as a relative time, so this is the age of the
+    values of the other sensors, including results restored after a restart.
+    """
+
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry):
+        """Initializing the YaInternetometr last measurement sensor."""
+        super().__init__(coordinator)
+
+        self._attr_has_entity_name = True
+        self._attr_translation_key = SENSOR_LAST_MEASUREMENT
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
+        self._attr_icon = "mdi:clock-check-outline"
+        self._attr_unique_id = f"{entry.entry_id}_{SENSOR_LAST_MEASUREMENT}"
+
+        # General information about "Device" for combining all sensors
+        self._attr_device_info = device_info(entry)
+
+    @property
+    def native_value(self):
+        """Returns when the last successful test finished."""
+        return self.coordinator.last_measurement
@@ -0,0 +1,157 @@
+# custom_components/yainternetometr/stats.py
+
+from __future__ import annotations
+from bisect import bisect_left, insort
+from collections import deque
+import math
+
+from .const import SENSOR_PING, SENSOR_DOWNLOAD, SENSOR_UPLOAD, STATISTIC_WINDOWS, STATISTIC_PERCENTILES
+from .const import PHASE_TIMEOUTS, PHASE_TIMEOUT_FLOOR, PHASE_TIMEOUT_FACTOR, PHASE_TIMEOUT_PERCENTILE
+from .const import PHASE_DURATION_HISTORY, PHASE_TIMEOUT_MIN_SAMPLES
+
+
+def statistic_key(metric: str, statistic: str, window: str) -> str:
+    """Return the data key of a rolling statistic, for example `download_p95_24h`."""
+    return f"{metric}_{statistic}_{window}"
+
+
+def percentile(sorted_values: list[float], percent: float) -> float | None:
+    """Return the linearly interpolated percentile of sorted values, None for no values."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class SlidingWindow:
+    """
+    Values of the last `span` seconds, kept sorted for percentiles, with a running sum for the mean.
+
+    Adding a value or expiring the oldest one costs a binary search and a list insert or
+    delete, so a run only touches the values that enter or leave the window.
+
+    Attributes:
+        `span` (float): Window length in seconds.
+    """
+
+    def __init__(self, span: float) -> None:
+        """Initialize an empty window."""
+        self.span = span
+        self._entries: deque[tuple[float, float]] = deque()
+        self._sorted: list[float] = []
+        self._sum = 0.0
+
+    def __len__(self) -> int:
+        """Number of values in the window."""
+        return len(self._sorted)
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Add a value measured at `timestamp`. NaN values are ignored."""
+        if math.isnan(value):
+            return
+        self._entries.append((timestamp, value))
+        insort(self._sorted, value)
+        self._sum += value
+
+    def expire(self, now: float) -> None:
+        """Drop values older than `span` seconds before `now`."""
+        while self._entries and self._entries[0][0] <= now - self.span:
+            _, value = self._entries.popleft()
+            del self._sorted[bisect_left(self._sorted, value)]
+            self._sum -= value
+        if not self._sorted:
+            # Reset accumulated rounding errors whenever the window runs empty.
+            self._sum = 0.0
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the linearly interpolated percentile, None for an empty window."""
+        return percentile(self._sorted, percent)
+
+    @property
+    def mean(self) -> float | None:
+        """Mean of the window, None for an empty window."""
+        return self._sum / len(self._sorted) if self._sorted else None
+
+
+class RollingStatistics:
+    """
+    Rolling download/upload percentiles and mean ping over the `STATISTIC_WINDOWS`.
+
+    The windows are seeded once from the measurement history and then updated with
+    every new run, so the history is never scanned again. Old values are dropped whenever
+    the statistics are read, the coordinator reads them every `STATISTIC_EXPIRE_INTERVAL`.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty windows."""
+        self._windows = {
+            (metric, window): SlidingWindow(span)
+            for metric in (SENSOR_PING, SENSOR_DOWNLOAD, SENSOR_UPLOAD)
+            for window, span in STATISTIC_WINDOWS.items()
+        }
+
+    def add(self, timestamp: float, values: dict[str, float | None]) -> None:
+        """Add the metrics of one run. Missing metrics are skipped."""
+        for (metric, _), window in self._windows.items():
+            value = values.get(metric)
+            if value is not None:
+                window.add(timestamp, value)
+
+    def as_data(self, now: float) -> dict[str, float | None]:
+        """Expire old values and return every statistic keyed by `statistic_key`."""
+        data: dict[str, float | None] = {}
+        for (metric, window_name), window in self._windows.items():
+            window.expire(now)
+            if metric == SENSOR_PING:
+                data[statistic_key(metric, "mean", window_name)] = window.mean
+                continue
+            for percent in STATISTIC_PERCENTILES:
+                data[statistic_key(metric, f"p{percent}", window_name)] = window.percentile(percent)
+        return data
+
+
+class PhaseTimeouts:
+    """
+    Per-phase timeouts derived from the durations of recent runs.
+
+    The timeout of a phase is the `PHASE_TIMEOUT_PERCENTILE` of its last `PHASE_DURATION_HISTORY`
+    durations times `PHASE_TIMEOUT_FACTOR`, clamped between `PHASE_TIMEOUT_FLOOR` and the
+    `PHASE_TIMEOUTS` ceiling. Until `PHASE_TIMEOUT_MIN_SAMPLES` durations are known the ceiling
+    is used.
+
+    A phase that ran out of time is recorded with the time it got, which is only a lower bound
+    of its real duration. A single such sample hardly moves a high percentile, so a miss also
+    sets a minimum of the timeout it hit times `PHASE_TIMEOUT_FACTOR`. The timeout of a link that
+    became slower grows geometrically with every miss until the phase finishes again, which
+    clears the minimum, or the ceiling is reached.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without durations, every timeout starts at its ceiling."""
+        self._durations = {phase: deque(maxlen=PHASE_DURATION_HISTORY) for phase in PHASE_TIMEOUTS}
+        self._backoff: dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float, timed_out: bool = False) -> None:
+        """Remember how long a phase took, and whether it was stopped by its timeout."""
+        if phase not in self._durations:
+            return
+        self._durations[phase].append(seconds)
+        if timed_out:
+            self._backoff[phase] = max(seconds, self._backoff.get(phase, 0.0)) * PHASE_TIMEOUT_FACTOR
+        else:
+            self._backoff.pop(phase, None)
+
+    def timeout(self, phase: str) -> float:
+        """Return the timeout of a phase in seconds."""
+        durations = self._durations[phase]
+        ceiling = PHASE_TIMEOUTS[phase]
+        if len(durations) < PHASE_TIMEOUT_MIN_SAMPLES:
+            return ceiling
+        observed = percentile(sorted(durations), PHASE_TIMEOUT_PERCENTILE) * PHASE_TIMEOUT_FACTOR
+        return min(ceiling, max(PHASE_TIMEOUT_FLOOR[phase], observed, self._backoff.get(phase, 0.0)))
+
+    def as_dict(self) -> dict[str, float]:
+        """Return the timeouts of all phases, ready to pass to the client."""
+        return {phase: self.timeout(phase) for phase in self._durations}
@@ -0,0 +1,177 @@
+# custom_components/yainternetometr/throughput.py
+
+from __future__ import annotations
+from collections import deque
+from collections.abc import Sequence
+from functools import cache
+import time
+from types import ModuleType
+
+from .const import CONVERGENCE_SLICE, CONVERGENCE_AVERAGE_SLICES, CONVERGENCE_WINDOW_SLICES, CONVERGENCE_TOLERANCE, CONVERGENCE_MIN_DURATION
+from .const import THROUGHPUT_SLICE, THROUGHPUT_RAMP_FRACTION, THROUGHPUT_TRIM, THROUGHPUT_VECTORIZE_MIN_SAMPLES
+
+
+@cache
+def _numpy() -> ModuleType | None:
+    """Return numpy if it is installed. It is only needed for large sample sets."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _slice_bytes(samples: Sequence[tuple[float, int]], slice_duration: float) -> list[float]:
+    """Sum sample sizes into consecutive slices of `slice_duration` seconds."""
+    base_ts = samples[0][0]
+    np = _numpy() if len(samples) >= THROUGHPUT_VECTORIZE_MIN_SAMPLES else None
+
+    if np is not None:
+        data = np.asarray(samples, dtype=np.float64)
+        indexes = ((data[:, 0] - base_ts) / slice_duration).astype(np.int64)
+        return np.bincount(indexes, weights=data[:, 1]).tolist()
+
+    slices = [0.0] * (int((samples[-1][0] - base_ts) / slice_duration) + 1)
+    for ts, size in samples:
+        slices[int((ts - base_ts) / slice_duration)] += size
+    return slices
+
+
+def compute_throughput_mbps(
+        samples: Sequence[tuple[float, int]],
+        slice_duration: float = THROUGHPUT_SLICE,
+        ramp_fraction: float = THROUGHPUT_RAMP_FRACTION,
+        trim: float = THROUGHPUT_TRIM,
+) -> float:
+    """
+    Calculate throughput in Mbit/s from raw (timestamp, bytes) samples.
+
+    Samples are summed into time slices. Leading slices are dropped until the rate first
+    reaches `ramp_fraction` of the 90th percentile slice rate, which leaves the TCP slow-start
+    ramp out. The trailing partial slice is dropped as well. The result is the mean of the
+    remaining slice rates with `trim` of the lowest and the highest values cut off.
+
+    Binning is vectorised with numpy when there are at least `THROUGHPUT_VECTORIZE_MIN_SAMPLES`
+    samples and numpy is available.
+
+    Parameters:
+        `samples` (Sequence[tuple[float, int]]): Transfer samples in chronological order, timestamps in seconds.
+        `slice_duration` (float): Length of one slice in seconds.
+        `ramp_fraction` (float): Share of the reference rate that marks the end of slow start.
+        `trim` (float): Share of slices cut off at each end before averaging.
+
+    Returns:
+        float: Throughput in Mbit/s, 0.0 if there are not enough samples.
+    """
+
+    if len(samples) < 2:
+        return 0.0
+
+    slices = _slice_bytes(samples, slice_duration)
+    if len(slices) < 3:
+        # Too short for slicing, fall back to the average over the transfer.
+        duration = samples[-1][0] - samples[0][0]
+        transferred = sum(size for _, size in samples) - samples[0][1]
+        return transferred * 8 / duration / 1_000_000 if duration > 0 else 0.0
+
+    rates = [size * 8 / slice_duration / 1_000_000 for size in slices[:-1]]
+
+    reference = sorted(rates)[int(0.9 * (len(rates) - 1))]
+    ramp_end = next(
+        (idx for idx, rate in enumerate(rates) if rate >= reference * ramp_fraction),
+        0,
+    )
+    rates = sorted(rates[ramp_end:])
+
+    cut = int(len(rates) * trim)
+    if cut and len(rates) > 2 * cut:
+        rates = rates[cut:-cut]
+
+    return sum(rates) / len(rates)
+
+
+class ThroughputSampler:
+    """
+    Streaming throughput sampler with convergence detection.
+
+    Transferred bytes are accumulated into fixed time slices. After every slice a rolling
+    throughput estimate over the last `average_slices` slices is recorded. The transfer is
+    considered converged once the last `window_slices` estimates stay within `tolerance`
+    of each other and at least `min_duration` seconds have passed, which lets a phase stop
+    as soon as its throughput has stabilised.
+
+    Attributes:
+        `slice_duration` (float): Length of one time slice in seconds.
+        `total_bytes` (int): Bytes recorded since the first call to `add`.
+    """
+
+    def __init__(
+            self,
+            slice_duration: float = CONVERGENCE_SLICE,
+            average_slices: int = CONVERGENCE_AVERAGE_SLICES,
+            window_slices: int = CONVERGENCE_WINDOW_SLICES,
+            tolerance: float = CONVERGENCE_TOLERANCE,
+            min_duration: float = CONVERGENCE_MIN_DURATION,
+    ) -> None:
+        """Initialize an empty sampler."""
+        self.slice_duration = slice_duration
+        self.total_bytes = 0
+        self._tolerance = tolerance
+        self._min_duration = min_duration
+        self._slices: deque[int] = deque(maxlen=average_slices)
+        self._estimates: deque[float] = deque(maxlen=window_slices)
+        self._started: float | None = None
+        self._last: float | None = None
+        self._slice_start = 0.0
+        self._slice_bytes = 0
+
+    def add(self, size: int, now: float | None = None) -> None:
+        """Record `size` transferred bytes at `now` (defaults to the current perf counter)."""
+        if now is None:
+            now = time.perf_counter()
+
+        if self._started is None:
+            self._started = self._slice_start = now
+
+        while now - self._slice_start >= self.slice_duration:
+            self._close_slice()
+
+        self._slice_bytes += size
+        self.total_bytes += size
+        self._last = now
+
+    def _close_slice(self) -> None:
+        """Finish the current slice and update the rolling estimate."""
+        self._slices.append(self._slice_bytes)
+        self._slice_bytes = 0
+        self._slice_start += self.slice_duration
+
+        if len(self._slices) == self._slices.maxlen:
+            window = len(self._slices) * self.slice_duration
+            self._estimates.append(sum(self._slices) * 8 / window / 1_000_000)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds between the first and the last recorded sample."""
+        if self._started is None or self._last is None:
+            return 0.0
+        return self._last - self._started
+
+    @property
+    def converged(self) -> bool:
+        """Whether the rolling estimate has stayed within the tolerance over the whole window."""
+        if self.elapsed < self._min_duration or len(self._estimates) < self._estimates.maxlen:
+            return False
+
+        highest = max(self._estimates)
+        return highest > 0 and (highest - min(self._estimates)) / highest <= self._tolerance
+
+    @property
+    def mbps(self) -> float:
+        """Converged throughput in Mbit/s, or the average over the whole transfer otherwise."""
+        if self.converged:
+            return sum(self._estimates) / len(self._estimates)
+
+        if self.elapsed <= 0:
+            return 0.0
+        return self.total_bytes * 8 / self.elapsed / 1_000_000
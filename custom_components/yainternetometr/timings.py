@@ -0,0 +1,139 @@
+# custom_components/yainternetometr/timings.py
+
+from __future__ import annotations
+from functools import partial
+import time
+from types import SimpleNamespace
+
+import aiohttp
+
+from .const import PHASE_IDLE
+
+
+class RequestTimings:
+    """
+    Per-request network timing collector built on aiohttp trace hooks.
+
+    Every request of the pooled session is split into phases:
+
+    - `dns`: host name resolution, zero on a DNS cache hit or a reused connection.
+    - `connect`: opening a new connection, including the TLS handshake for https.
+      aiohttp has no separate TLS hook, so the two cannot be told apart.
+    - `ttfb`: from the moment the request was fully sent to the response headers.
+      An upload body is "sent" once it is handed to the socket, so the part that is
+      still in kernel buffers at that point is counted here.
+    - `transfer`: sending the request body and reading the response body.
+
+    The body read ends when the connection is released back to the pool, so the
+    measurement does not depend on how the caller consumes the response.
+    Requests are grouped by the test phase that was active when they started,
+    unless they name their own group in `trace_request_ctx`. Requests made between
+    test runs, such as the latency monitor pings, are not recorded.
+
+    Attributes:
+        `phase` (str): Test phase assigned to requests that start now.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty collector."""
+        self.phase = PHASE_IDLE
+        self._records: dict[str, list[dict[str, float]]] = {}
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Return a trace config that feeds this collector. Pass it to the session."""
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_dns_resolvehost_start.append(self._on_dns_start)
+        trace_config.on_dns_resolvehost_end.append(self._on_dns_end)
+        trace_config.on_connection_create_start.append(self._on_connect_start)
+        trace_config.on_connection_create_end.append(self._on_connect_end)
+        trace_config.on_request_headers_sent.append(self._on_headers_sent)
+        trace_config.on_request_chunk_sent.append(self._on_chunk_sent)
+        trace_config.on_request_end.append(self._on_request_end)
+        return trace_config
+
+    def reset(self) -> None:
+        """Forget the requests of the previous run."""
+        self._records = {}
+
+    def summary(self, *phases: str) -> dict[str, float | int]:
+        """
+        Aggregate the requests of `phases`.
+
+        Returns:
+            dict: Number of requests and new connections, and the mean duration of every
+            timing phase in milliseconds. DNS and connect are averaged over the requests
+            that actually resolved a host or opened a connection.
+        """
+
+        records = [record for phase in phases for record in self._records.get(phase, [])]
+        if not records:
+            return {}
+
+        resolved = [record["dns"] for record in records if "dns" in record]
+        connected = [record["connect"] for record in records if "connect" in record]
+
+        def mean_ms(values: list[float]) -> float:
+            return round(sum(values) / len(values) * 1000, 1) if values else 0.0
+
+        return {
+            "requests": len(records),
+            "new_connections": len(connected),
+            "dns_ms": mean_ms(resolved),
+            "connect_ms": mean_ms(connected),
+            "ttfb_ms": mean_ms([record["ttfb"] for record in records]),
+            "transfer_ms": mean_ms([record["transfer"] for record in records]),
+        }
+
+    async def _on_request_start(self, session, ctx: SimpleNamespace, params) -> None:
+        # Requests may override the phase with `trace_request_ctx={"phase": ...}`.
+        ctx.phase = (ctx.trace_request_ctx or {}).get("phase", self.phase)
+        ctx.dns = ctx.connect = None
+        ctx.headers_sent = ctx.last_chunk_sent = None
+
+    async def _on_dns_start(self, session, ctx: SimpleNamespace, params) -> None:
+        ctx.dns_start = time.perf_counter()
+
+    async def _on_dns_end(self, session, ctx: SimpleNamespace, params) -> None:
+        ctx.dns = time.perf_counter() - ctx.dns_start
+
+    async def _on_connect_start(self, session, ctx: SimpleNamespace, params) -> None:
+        ctx.connect_start = time.perf_counter()
+
+    async def _on_connect_end(self, session, ctx: SimpleNamespace, params) -> None:
+        # Resolution happens while the connection is being created.
+        ctx.connect = time.perf_counter() - ctx.connect_start - (ctx.dns or 0.0)
+
+    async def _on_headers_sent(self, session, ctx: SimpleNamespace, params) -> None:
+        ctx.headers_sent = time.perf_counter()
+
+    async def _on_chunk_sent(self, session, ctx: SimpleNamespace, params) -> None:
+        ctx.last_chunk_sent = time.perf_counter()
+
+    async def _on_request_end(self, session, ctx: SimpleNamespace, params: aiohttp.TraceRequestEndParams) -> None:
+        ctx.response_start = time.perf_counter()
+        connection = params.response.connection
+        if connection is None:
+            self._finish(ctx)
+        else:
+            connection.add_callback(partial(self._finish, ctx))
+
+    def _finish(self, ctx: SimpleNamespace) -> None:
+        """Store the timings of a finished request."""
+        if ctx.phase == PHASE_IDLE:
+            return
+
+        now = time.perf_counter()
+        sent = ctx.headers_sent or ctx.response_start
+        body_sent = ctx.last_chunk_sent or sent
+
+        record = {
+            "ttfb": ctx.response_start - body_sent,
+            "transfer": (body_sent - sent) + (now - ctx.response_start),
+        }
+        if ctx.dns is not None:
+            record["dns"] = ctx.dns
+        if ctx.connect is not None:
+            record["connect"] = ctx.connect
+
+        self._records.setdefault(ctx.phase, []).append(record)
@@ -0,0 +1,69 @@
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path.cwd()
+RUNS = 20
+
+# Modules Home Assistant has already loaded by the time it sets up the integration.
+PRELOAD = (
+    "aiohttp",
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+)
+
+# What setup imports now, and what it imported when the client was loaded eagerly.
+SCENARIOS = {
+    "setup, lazy client": ("custom_components.yainternetometr",),
+    "setup, eager client": ("custom_components.yainternetometr", "custom_components.yainternetometr.client"),
+}
+
+SNIPPET = """
+import importlib, sys, time
+for name in {preload!r}:
+    importlib.import_module(name)
+t0 = time.perf_counter()
+for name in {targets!r}:
+    importlib.import_module(name)
+print(time.perf_counter() - t0, "yaspeedtest" in sys.modules)
+"""
+
+
+def measure(targets: tuple[str, ...], runs: int) -> tuple[float, bool]:
+    """Import `targets` in `runs` fresh interpreters, return the median time in ms and whether yaspeedtest was loaded."""
+    timings = []
+    loaded = False
+    code = SNIPPET.format(preload=PRELOAD, targets=targets)
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        timings.append(float(output[0]) * 1000)
+        loaded = output[1] == "True"
+    return statistics.median(timings), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import cost of the integration at setup.")
+    parser.add_argument("--runs", type=int, default=RUNS, help=f"fresh interpreters per scenario (default {RUNS})")
+    args = parser.parse_args()
+
+    results = {name: measure(targets, args.runs) for name, targets in SCENARIOS.items()}
+    for name, (median_ms, loaded) in results.items():
+        print(f"{name:<22} {median_ms:8.1f} ms   yaspeedtest loaded: {loaded}")
+
+    lazy_ms, _ = results["setup, lazy client"]
+    eager_ms, _ = results["setup, eager client"]
+    print(f"✔ Setup import cost reduced by {eager_ms - lazy_ms:.1f} ms ({(1 - lazy_ms / eager_ms) * 100:.0f} %)")
+
+
+if __name__ == "__main__":
+    main()